@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+이미지/API 요청 경로 벤치마크
+KRIC 대신 로컬 HTTP 서버(StubKric)를 띄우고, 다운로드 경로별로 처리량과 지연을 잽니다.
+- 서버가 흉내 내는 주소
+    /hc/ext/images/visual/handicapped/cnv/{운영기관}/{파일}.png   PNG (ETag, If-None-Match -> 304)
+    /hc/visual/handicapped/selectLegendClickInfo.do              역 코드 매핑 JSON
+- 지연(--latency, --jitter), 404 비율(--not-found), 500바이트 미만 오류 응답 비율(--tiny), PNG 크기(--png-kb) 조절
+- 경로(PATHS)마다 별도 프로세스로 실행해 최대 메모리(peak RSS)를 따로 잽니다.
+    sequential : 예전 방식 (requests.get 하나씩 + time.sleep(--sleep))
+    engine     : kric_fetch.FetchEngine.download (download_mapping_images.py 기본)
+    sync-cold  : image_manifest.sync 첫 실행 (download_mapping_images.py --sync)
+    sync-warm  : image_manifest.sync 다시 실행 (304 응답)
+    legend     : harvest_station_mapping.fetch_legend (selectLegendClickInfo.do)
+- 결과: 이미지(요청)/초, p50/p99 지연, 최대 RSS. --json 으로 저장해 변경 전후를 비교할 수 있습니다.
+
+사용법:
+    python bench_fetch.py                                  # 전체 경로, 이미지 100개
+    python bench_fetch.py engine sync-warm --count 500 --latency 80 --not-found 0.3
+    python bench_fetch.py --workers 16 --rate 10 --json bench_before.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+IMAGE_ROUTE = '/hc/ext/images/visual/handicapped/cnv/'
+LEGEND_ROUTE = '/hc/visual/handicapped/selectLegendClickInfo.do'
+PATHS = ['sequential', 'engine', 'sync-cold', 'sync-warm', 'legend']
+
+IMAGE_COUNT = 100
+LEGEND_COUNT = 50
+PNG_KB = 60
+LATENCY_MS = 50
+JITTER_MS = 20
+NOT_FOUND = 0.1
+TINY = 0.05
+LEGACY_SLEEP = 0.3
+BENCH_RATE = 1000.0   # 기본은 속도 제한이 결과에 끼지 않게 크게 (--rate 로 실제 설정 재현)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def make_png(size):
+    """1x1 PNG 에 주석(tEXt) 청크를 붙여 약 size 바이트로 만듭니다."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    head = PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0))
+    head += chunk(b'IDAT', zlib.compress(b'\x00\x00'))
+    tail = chunk(b'IEND', b'')
+    filler = max(0, size - len(head) - len(tail) - 12 - 8)
+    return head + chunk(b'tEXt', b'Comment\x00' + b' ' * filler) + tail
+
+
+def picked(path, ratio, salt):
+    """주소마다 항상 같은 결과가 나오는 비율 추첨 (실행마다 같은 주소가 404)"""
+    return zlib.crc32((salt + path).encode('utf-8')) % 10000 < ratio * 10000
+
+
+class StubKric:
+    """KRIC 이미지/매핑 주소를 흉내 내는 로컬 서버 (별도 스레드)"""
+
+    def __init__(self, latency_ms=LATENCY_MS, jitter_ms=JITTER_MS, not_found=NOT_FOUND, tiny=TINY, png_kb=PNG_KB):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.not_found = not_found
+        self.tiny = tiny
+        self.png = make_png(png_kb * 1024)
+        self.etag = '"%08x"' % zlib.crc32(self.png)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body=b'', content_type='image/png', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body and self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                time.sleep(max(0.0, stub.latency + random.uniform(-stub.jitter, stub.jitter)))
+                url = urlparse(self.path)
+                if url.path.startswith(IMAGE_ROUTE):
+                    if picked(url.path, stub.not_found, '404'):
+                        return self.send(404, b'Not Found', 'text/plain')
+                    if picked(url.path, stub.tiny, 'tiny'):
+                        return self.send(200, b'<html>error</html>', 'text/html')
+                    if self.headers.get('If-None-Match') == stub.etag:
+                        return self.send(304, headers={'ETag': stub.etag})
+                    return self.send(200, stub.png, headers={'ETag': stub.etag})
+                if url.path == LEGEND_ROUTE:
+                    query = parse_qs(url.query)
+                    area = query.get('paramAreCd', ['01'])[0]
+                    line = query.get('paramLnCd', ['1'])[0]
+                    stations = [{'railOprIsttCd': 'S1', 'lnCd': line, 'stinNm': f"역{area}{line}{i}",
+                                 'prprStinCd': f"{i:04d}"} for i in range(30)]
+                    body = json.dumps({'resultStinList': stations}, ensure_ascii=False).encode('utf-8')
+                    return self.send(200, body, 'application/json;charset=UTF-8')
+                self.send(404, b'Not Found', 'text/plain')
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ----- 자식 프로세스: 경로 하나 실행 -----
+
+def image_jobs(base_url, count, out_dir):
+    jobs = []
+    for i in range(count):
+        name = f"S1_{i % 9 + 1}_{i:04d}.png"
+        jobs.append({'key': name[:-4], 'url': f"{base_url}{IMAGE_ROUTE}S1/{name}",
+                     'filepath': os.path.join(out_dir, name)})
+    return jobs
+
+
+def timed(func, latencies):
+    def run(item):
+        start = time.perf_counter()
+        try:
+            return func(item)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return run
+
+
+def run_path(path, args):
+    """경로 하나를 실행하고 (처리한 수, 성공 수, 요청별 지연 목록)을 돌려줍니다."""
+    import requests
+
+    import harvest_station_mapping
+    import image_manifest
+    from kric_fetch import FetchEngine
+
+    engine = FetchEngine(workers=args.workers, rate=args.rate, cache=None)
+    latencies = []
+    ok = 0
+
+    if path == 'legend':
+        harvest_station_mapping.BASE_URL = args.base_url
+        combos = [(f"{n // 9 + 1:02d}", str(n % 9 + 1)) for n in range(args.legend_count)]
+        fetch = timed(lambda combo: harvest_station_mapping.fetch_legend(engine, *combo), latencies)
+        for _, stations, error in engine.map(fetch, combos):
+            ok += error is None and bool(stations)
+        return len(combos), ok, latencies, LEGEND_ROUTE
+
+    jobs = image_jobs(args.base_url, args.count, args.out_dir)
+    if path == 'sequential':
+        session = requests.Session()
+        for job in jobs:
+            start = time.perf_counter()
+            response = session.get(job['url'], timeout=15)
+            if response.status_code == 200 and len(response.content) >= 500:
+                with open(job['filepath'], 'wb') as f:
+                    f.write(response.content)
+                ok += 1
+            latencies.append(time.perf_counter() - start)
+            time.sleep(args.sleep)
+    elif path == 'engine':
+        fetch = timed(lambda job: engine.download(job['url'], job['filepath'], min_bytes=500, timeout=15), latencies)
+        for _, result, error in engine.map(fetch, jobs):
+            ok += error is None and result is not None
+    else:
+        manifest = image_manifest.ImageManifest(os.path.join(args.out_dir, 'image_manifest.json'))
+        fetch = timed(lambda job: manifest.sync(engine, job['key'], job['url'], job['filepath']), latencies)
+        for _, status, error in engine.map(fetch, jobs):
+            ok += error is None and status != image_manifest.FAILED and status != image_manifest.GONE
+        manifest.save()
+    return len(jobs), ok, latencies, IMAGE_ROUTE
+
+
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def child_main(args):
+    start = time.perf_counter()
+    total, ok, latencies, endpoint = run_path(args.path, args)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'path': args.path,
+        'endpoint': endpoint,
+        'total': total,
+        'ok': ok,
+        'seconds': round(elapsed, 3),
+        'per_sec': round(ok / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss': peak_rss()
+    }))
+
+
+# ----- 부모 프로세스 -----
+
+def run_child(path, args, base_url, out_dir):
+    command = [sys.executable, os.path.abspath(__file__), '--child', path, '--base-url', base_url,
+               '--out-dir', out_dir, '--count', str(args.count), '--legend-count', str(args.legend_count),
+               '--workers', str(args.workers), '--rate', str(args.rate), '--sleep', str(args.sleep)]
+    output = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr.strip() else f"exit {output.returncode}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KRIC 요청 경로 벤치마크 (로컬 대역 서버)')
+    parser.add_argument('paths', nargs='*', help=f"경로 (기본: 전체 {', '.join(PATHS)})")
+    parser.add_argument('--count', type=int, default=IMAGE_COUNT, help=f'이미지 수 (기본 {IMAGE_COUNT})')
+    parser.add_argument('--legend-count', type=int, default=LEGEND_COUNT, help=f'매핑 조회 수 (기본 {LEGEND_COUNT})')
+    parser.add_argument('--latency', type=float, default=LATENCY_MS, help=f'서버 응답 지연 ms (기본 {LATENCY_MS})')
+    parser.add_argument('--jitter', type=float, default=JITTER_MS, help=f'지연 흔들림 ±ms (기본 {JITTER_MS})')
+    parser.add_argument('--not-found', type=float, default=NOT_FOUND, help=f'404 비율 (기본 {NOT_FOUND})')
+    parser.add_argument('--tiny', type=float, default=TINY, help=f'500바이트 미만 오류 응답 비율 (기본 {TINY})')
+    parser.add_argument('--png-kb', type=int, default=PNG_KB, help=f'PNG 크기 KB (기본 {PNG_KB})')
+    parser.add_argument('--workers', type=int, default=8, help='FetchEngine 동시 요청 수 (기본 8)')
+    parser.add_argument('--rate', type=float, default=BENCH_RATE, help=f'호스트당 초당 요청 수 (기본 {BENCH_RATE:g})')
+    parser.add_argument('--sleep', type=float, default=LEGACY_SLEEP, help=f'sequential 경로의 요청 간 대기 (기본 {LEGACY_SLEEP})')
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    parser.add_argument('--child', choices=PATHS, dest='path', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--out-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        child_main(args)
+        return
+
+    unknown = [path for path in args.paths if path not in PATHS]
+    if unknown:
+        parser.error(f"알 수 없는 경로: {', '.join(unknown)} ({', '.join(PATHS)})")
+    wanted = set(args.paths or PATHS)
+    if 'sync-warm' in wanted:
+        wanted.add('sync-cold')   # 304 를 받으려면 먼저 한 번 받아 둬야 함
+    paths = [path for path in PATHS if path in wanted]
+    print(f"[벤치] 이미지 {args.count}개 ({args.png_kb} KB), 지연 {args.latency:g}±{args.jitter:g} ms, "
+          f"404 {args.not_found:.0%}, 오류 응답 {args.tiny:.0%}, 동시 {args.workers}, 초당 {args.rate:g}\n")
+
+    results = []
+    sync_dir = None   # sync-cold 가 받아 둔 폴더 (sync-warm 이 이어서 사용)
+    with StubKric(args.latency, args.jitter, args.not_found, args.tiny, args.png_kb) as stub:
+        for path in paths:
+            if path == 'sync-warm' and sync_dir is not None:
+                out_dir = sync_dir
+            else:
+                out_dir = tempfile.mkdtemp(prefix='bench_fetch_')
+            try:
+                before = stub.requests
+                result = run_child(path, args, stub.base_url, out_dir)
+                result['server_requests'] = stub.requests - before
+                results.append(result)
+                rss = f"{result['peak_rss'] / 1e6:7.1f} MB" if result['peak_rss'] else '      -'
+                print(f"   {path:<11} {result['per_sec']:8.1f} 개/초  p50 {result['p50_ms']:7.1f} ms  "
+                      f"p99 {result['p99_ms']:7.1f} ms  RSS {rss}  ({result['ok']}/{result['total']} 성공, "
+                      f"{result['seconds']:.1f}초)")
+            except Exception as e:
+                print(f"   {path:<11} [ERROR] {str(e)[:100]}")
+            finally:
+                if path == 'sync-cold':
+                    sync_dir = out_dir
+                else:
+                    shutil.rmtree(out_dir, ignore_errors=True)
+        if sync_dir is not None:
+            shutil.rmtree(sync_dir, ignore_errors=True)
+
+    if args.json:
+        settings = {key: getattr(args, key) for key in ('count', 'legend_count', 'latency', 'jitter', 'not_found',
+                                                       'tiny', 'png_kb', 'workers', 'rate', 'sleep')}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n[저장] '{args.json}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+배포용 정적 번들 생성 (dist/)
+- index.html 이 불러오는 데이터 JSON을 공백 없이 다시 쓰고, 내용 해시를 넣은 이름으로 저장
+  (station_prpr_mapping_ok.json -> dist/data/station_prpr_mapping_ok.3f2a9c1d0b7e.json)
+- 각 파일의 .gz 와, brotli 모듈이 있으면 .br 도 미리 만들어 둠 (서버가 그대로 전송)
+- dist/index.html 은 해시 이름을 가리키도록 주소를 바꿔 씀
+- 이미지 폴더(station_images, station_images_opt, station_tiles)는 하드링크(안 되면 복사)로 연결
+- dist/_headers 에 해시 이름 파일은 immutable, index.html 은 매번 확인하도록 캐시 헤더 기록
+- dist/sw.js 서비스 워커 생성 (service_worker.py) - 첫 방문 뒤에는 페이지/데이터를 캐시에서 바로 열고 오프라인에서도 동작
+재방문 시에는 index.html 만 다시 받고, 데이터는 바뀌었을 때만 새 이름으로 받습니다.
+
+사용법: python build_bundle.py [--out dist]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from image_store import link_or_copy
+from service_worker import SW_FILE, precache_images, write_service_worker
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+PAGE_FILE = 'index.html'
+OUT_DIR = 'dist'
+DATA_DIR = 'data'
+HASH_LENGTH = 12
+
+# index.html 이 fetch 하는 데이터 파일 (없는 파일은 건너뜀)
+DATA_FILES = [
+    'station_prpr_mapping_ok.json',
+    'search_index.json',
+    'nursing_rooms_by_key.json',
+    'image_variants.json',
+    'image_tiles.json'
+]
+# 그대로 연결하는 폴더 (station_images_opt, station_tiles 는 이미 해시 이름)
+ASSET_DIRS = ['station_images', 'station_images_opt', 'station_tiles']
+IMMUTABLE_DIRS = ['station_images_opt', 'station_tiles']
+
+HEADERS_FILE = '_headers'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def minify_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def hashed_name(name, body):
+    base, ext = os.path.splitext(name)
+    return f"{base}.{hashlib.sha256(body).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def write_atomic(path, body):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def write_compressed(path, body):
+    """path 와 path.gz, (가능하면) path.br 을 씁니다. 돌려주는 값: {확장자: 크기}"""
+    sizes = {'': len(body)}
+    write_atomic(path, body)
+    # mtime=0 으로 같은 내용이면 같은 .gz
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    write_atomic(path + '.gz', gz)
+    sizes['.gz'] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        write_atomic(path + '.br', br)
+        sizes['.br'] = len(br)
+    return sizes
+
+
+def rewrite_page(html, renames):
+    """index.html 안의 '원래 이름' 문자열을 'data/해시 이름' 으로 바꿉니다."""
+    for name, target in renames.items():
+        html, count = re.subn(r"(['\"])" + re.escape(name) + r"\1", lambda m: m.group(1) + target + m.group(1), html)
+        if not count:
+            print(f"   [경고] {PAGE_FILE} 에서 '{name}' 참조를 찾지 못했습니다.")
+    return html
+
+
+def link_tree(src_dir, dst_dir):
+    """src_dir 의 파일을 dst_dir 에 하드링크(안 되면 복사)하고, 원본에 없는 파일은 지웁니다."""
+    wanted = set()
+    for root, _, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        os.makedirs(os.path.join(dst_dir, rel_root), exist_ok=True)
+        for name in files:
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            wanted.add(rel)
+            src = os.path.join(src_dir, rel)
+            dst = os.path.join(dst_dir, rel)
+            if not (os.path.exists(dst) and os.path.samefile(src, dst)):
+                link_or_copy(src, dst)
+    removed = 0
+    for root, _, files in os.walk(dst_dir):
+        for name in files:
+            rel = os.path.normpath(os.path.relpath(os.path.join(root, name), dst_dir))
+            if rel not in wanted:
+                os.remove(os.path.join(dst_dir, rel))
+                removed += 1
+    return len(wanted), removed
+
+
+def headers_file():
+    lines = [f"/{DATA_DIR}/*", f"  Cache-Control: {IMMUTABLE}"]
+    for folder in IMMUTABLE_DIRS:
+        lines += [f"/{folder}/*", f"  Cache-Control: {IMMUTABLE}"]
+    for path in ['/', f"/{PAGE_FILE}", f"/{SW_FILE}"]:
+        lines += [path, f"  Cache-Control: {REVALIDATE}"]
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='배포용 정적 번들 (해시 이름 + 미리 압축)')
+    parser.add_argument('--out', default=OUT_DIR, help=f'출력 폴더 (기본 {OUT_DIR})')
+    args = parser.parse_args()
+
+    data_dir = os.path.join(args.out, DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+    if brotli is None:
+        print("[안내] brotli 모듈이 없어 .br 파일은 만들지 않습니다. (pip install brotli)")
+
+    renames = {}
+    total_raw = total_min = total_gz = 0
+    for name in DATA_FILES:
+        if not os.path.exists(name):
+            print(f"   [건너뜀] {name} 없음")
+            continue
+        body = minify_json(name)
+        target = hashed_name(name, body)
+        sizes = write_compressed(os.path.join(data_dir, target), body)
+        renames[name] = f"{DATA_DIR}/{target}"
+        raw = os.path.getsize(name)
+        total_raw += raw
+        total_min += sizes['']
+        total_gz += sizes['.gz']
+        extra = f", br {sizes['.br'] / 1024:.1f} KB" if '.br' in sizes else ''
+        print(f"   [데이터] {name} -> {target} ({raw / 1024:.1f} KB -> {sizes[''] / 1024:.1f} KB, "
+              f"gz {sizes['.gz'] / 1024:.1f} KB{extra})")
+
+    # 이번에 만들지 않은 이전 해시 파일 정리
+    used = {os.path.basename(target) for target in renames.values()}
+    for name in os.listdir(data_dir):
+        if re.sub(r'\.(gz|br)$', '', name) not in used:
+            os.remove(os.path.join(data_dir, name))
+
+    with open(PAGE_FILE, 'r', encoding='utf-8') as f:
+        html = rewrite_page(f.read(), renames)
+    write_compressed(os.path.join(args.out, PAGE_FILE), html.encode('utf-8'))
+    write_atomic(os.path.join(args.out, HEADERS_FILE), headers_file().encode('utf-8'))
+
+    for folder in ASSET_DIRS:
+        dst = os.path.join(args.out, folder)
+        if not os.path.isdir(folder):
+            if os.path.isdir(dst):
+                shutil.rmtree(dst)
+            continue
+        count, removed = link_tree(folder, dst)
+        print(f"   [연결] {folder}/ {count}개 (정리 {removed}개)")
+
+    precache = [PAGE_FILE] + list(renames.values())
+    if os.path.exists('image_variants.json'):
+        with open('image_variants.json', 'r', encoding='utf-8') as f:
+            precache += precache_images(json.load(f))
+    version = write_service_worker(args.out, precache)
+    print(f"   [서비스 워커] {SW_FILE} 버전 {version}, 미리 캐시 {len(precache)}개")
+
+    print("\n" + "="*50)
+    print(f"데이터 {len(renames)}개: 원본 {total_raw / 1024:.1f} KB -> 압축 전 {total_min / 1024:.1f} KB, gz {total_gz / 1024:.1f} KB")
+    print(f"[저장] '{args.out}/' ({PAGE_FILE}, {DATA_DIR}/, {HEADERS_FILE}, {SW_FILE})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+역 편의시설 안내도 이미지 최적화 빌드
+station_images/ 의 원본 PNG 하나마다 station_images_opt/ 에 아래 파일을 만듭니다.
+- 썸네일/모달/큰 화면용 폭(WIDTHS)별 WebP + 팔레트(256색) PNG
+- 원본 해상도 팔레트 PNG (lightbox 확대용)
+- 흐린 미리보기(LQIP) 데이터 URI
+파일명은 원본 내용 해시로 만들어 바뀐 원본만 다시 처리하고, index.html 의 srcset 용
+메타데이터를 image_variants.json 에 기록합니다. 작업은 프로세스 풀로 나눠 처리합니다.
+
+사용법: python build_images.py [--workers N]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageFilter
+
+from image_store import VIEW_NAME_RE, file_sha256
+from kric_fetch import positive_int, replace_from_temp
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+SOURCE_DIR = 'station_images'
+OUT_DIR = 'station_images_opt'
+METADATA_FILE = 'image_variants.json'
+
+WIDTHS = [320, 720, 1440]   # 썸네일, 모달, 큰 화면
+WEBP_QUALITY = 80
+LQIP_WIDTH = 16
+
+
+def save_atomic(im, path, fmt, **params):
+    """
+    같은 폴더의 임시 파일에 저장한 뒤 kric_fetch.replace_from_temp() 로 교체합니다 (stream_to_file 과 같은 방식).
+    중간에 멈춰도 잘린 파일이 최종 이름으로 남지 않아 다음 실행에서 다시 만듭니다.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            im.save(f, fmt, **params)
+        replace_from_temp(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_built(path):
+    """결과 파일이 있고 끝까지 읽히는지 (이 방식 이전에 중단돼 잘린 파일은 다시 만듦)"""
+    try:
+        with Image.open(path) as im:
+            im.verify()
+        return True
+    except (OSError, SyntaxError):
+        return False
+
+
+def save_palette_png(im, path):
+    """256색 팔레트 PNG로 저장 (투명도 유지)"""
+    save_atomic(im.quantize(256, method=Image.Quantize.FASTOCTREE), path, 'PNG', optimize=True)
+
+
+def make_lqip(im):
+    """폭 LQIP_WIDTH 픽셀짜리 흐린 WebP를 data URI로 만듭니다."""
+    height = max(1, round(im.height * LQIP_WIDTH / im.width))
+    small = im.resize((LQIP_WIDTH, height), Image.Resampling.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    small.save(buf, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def find_sources(source_dir=SOURCE_DIR):
+    """"{키} (원본.png)" 이름의 파일을 찾아 매핑 키 -> 경로로 돌려줍니다."""
+    sources = {}
+    for name in sorted(os.listdir(source_dir)):
+        match = VIEW_NAME_RE.match(name)
+        if match:
+            sources[match.group('key')] = os.path.join(source_dir, name)
+    return sources
+
+
+def build_one(src_path, out_dir):
+    """원본 하나를 처리하고 메타데이터를 돌려줍니다. 이미 만든 파일은 다시 만들지 않습니다."""
+    base = file_sha256(src_path)[:16]
+    with Image.open(src_path) as opened:
+        im = opened.convert('RGBA')
+
+    def out(name):
+        return os.path.join(out_dir, name)
+
+    meta = {'width': im.width, 'height': im.height, 'webp': [], 'png': []}
+    # 원본보다 큰 폭은 만들지 않음
+    for width in [w for w in WIDTHS if w < im.width] or [im.width]:
+        webp_name = f"{base}-{width}w.webp"
+        png_name = f"{base}-{width}w.png"
+        if not (is_built(out(webp_name)) and is_built(out(png_name))):
+            height = max(1, round(im.height * width / im.width))
+            resized = im.resize((width, height), Image.Resampling.LANCZOS)
+            save_atomic(resized, out(webp_name), 'WEBP', quality=WEBP_QUALITY, method=6)
+            save_palette_png(resized, out(png_name))
+        meta['webp'].append({'w': width, 'src': f"{OUT_DIR}/{webp_name}"})
+        meta['png'].append({'w': width, 'src': f"{OUT_DIR}/{png_name}"})
+
+    full_name = f"{base}-full.png"
+    if not is_built(out(full_name)):
+        save_palette_png(im, out(full_name))
+    meta['full'] = f"{OUT_DIR}/{full_name}"
+    meta['lqip'] = make_lqip(im)
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='역 이미지 최적화 (WebP, 여러 해상도, LQIP)')
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 1, help='프로세스 수')
+    args = parser.parse_args()
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    sources = find_sources()
+
+    print(f"[시작] {len(sources)}개 이미지 처리 중 (프로세스 {args.workers}개)...")
+
+    variants = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build_one, path, OUT_DIR): key for key, path in sources.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                variants[key] = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"   [ERROR] {key}: {str(e)[:80]}")
+
+    with open(METADATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(variants.items())), f, ensure_ascii=False, separators=(',', ':'))
+
+    # 사용하지 않는 이전 결과 정리
+    used = {os.path.basename(v['src']) for meta in variants.values() for v in meta['webp'] + meta['png']}
+    used.update(os.path.basename(meta['full']) for meta in variants.values())
+    removed = 0
+    for name in os.listdir(OUT_DIR):
+        if name not in used:
+            os.remove(os.path.join(OUT_DIR, name))
+            removed += 1
+
+    src_bytes = sum(os.path.getsize(path) for path in sources.values())
+    out_bytes = sum(os.path.getsize(os.path.join(OUT_DIR, name)) for name in os.listdir(OUT_DIR))
+    print("\n" + "="*50)
+    print(f"처리: {len(variants)}개, 실패: {failed}개, 정리: {removed}개")
+    print(f"원본 {src_bytes / 1e6:.1f} MB -> 결과 전체 {out_bytes / 1e6:.1f} MB")
+    print(f"[저장] '{METADATA_FILE}', '{OUT_DIR}/'")
+
+
+if __name__ == '__main__':
+    main()
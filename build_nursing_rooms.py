@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+서울 열린데이터 수유실 API(getFcNrsrm) 행을 역 매핑 키에 미리 연결 (빌드 단계)
+- 데이터를 한 번 받아 역명/호선명을 정규화한 뒤 station_prpr_mapping_ok.json 키와 정확히 일치시킴
+- 결과: nursing_rooms_by_key.json ({매핑 키: [API 행, ...]})
+- 연결하지 못한 행은 nursing_rooms_unmatched.json 에 기록
+index.html 은 역을 누를 때 apiRows 전체를 훑는 대신 이 파일에서 키 하나로 찾습니다.
+
+사용법:
+    python build_nursing_rooms.py                      # api.info-zip.kr/seoulapi 프록시 사용
+    python build_nursing_rooms.py --api-key KEY        # 서울 API 직접 호출
+    python build_nursing_rooms.py --input saved.json   # 저장해 둔 응답 사용
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import requests
+
+import seoul_api
+import station_index
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+PROXY_URL = 'https://api.info-zip.kr/seoulapi'
+OUTPUT_FILE = 'nursing_rooms_by_key.json'
+UNMATCHED_FILE = 'nursing_rooms_unmatched.json'
+
+LINE_RE = re.compile(r'(\d+)\s*호선')
+NAME_RE = re.compile(r'^(?P<base>[^(]+?)\s*(?:\((?P<qual>[^)]*)\))?$')
+
+
+def norm_line(s):
+    """'2호선', '02호선', '2' -> '2' / 그 외는 공백 제거"""
+    s = re.sub(r'\s+', '', str(s or ''))
+    match = LINE_RE.search(s)
+    if match:
+        return str(int(match.group(1)))
+    return str(int(s)) if s.isdigit() else s
+
+
+def norm_station(s):
+    """공백과 끝의 '역'을 제거"""
+    s = re.sub(r'\s+', '', str(s or ''))
+    return re.sub(r'역$', '', s) if len(s) > 2 else s
+
+
+def name_candidates(name, line):
+    """
+    정규화한 역명 후보를 우선순위대로 돌려줍니다.
+    괄호 안이 다른 노선(예: '신촌(경의중앙선)')이면 괄호를 떼지 않아 다른 역과 섞이지 않게 합니다.
+    """
+    full = norm_station(name)
+    candidates = [full]
+    match = NAME_RE.match(str(name or '').strip())
+    if match and match.group('qual') is not None:
+        qual = match.group('qual').strip()
+        is_line = bool(LINE_RE.search(qual)) or qual.endswith('선')
+        if not is_line or norm_line(qual) == line:
+            candidates.append(norm_station(match.group('base')))
+    return candidates
+
+
+def row_value(row, key):
+    """API 행에서 값 읽기 (대문자 키 응답도 허용)"""
+    value = row.get(key)
+    if value is None or str(value).strip() == '':
+        value = row.get(key.upper()) or row.get({'lineNm': 'LINE_NM', 'stnNm': 'STN_NM'}.get(key, ''))
+    return value
+
+
+def fetch_payload(api_key=None):
+    """API 키가 있으면 서울 API 전체 범위를 나눠 받아 합치고, 없으면 프록시 호출"""
+    if api_key:
+        return seoul_api.fetch_all(seoul_api.api_url(api_key))
+    response = requests.get(PROXY_URL, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def join_rows(rows, mapping_entries):
+    """(정규화 호선, 정규화 역명) 기준으로 API 행을 매핑 키에 연결합니다."""
+    keys_by_station = {}
+    for key, info in mapping_entries:
+        keys_by_station.setdefault((norm_line(info['lnCd']), norm_station(info['stinNm'])), []).append(key)
+
+    by_key = {}
+    unmatched = []
+    for row in rows:
+        line = norm_line(row_value(row, 'lineNm'))
+        keys = None
+        for name in name_candidates(row_value(row, 'stnNm'), line):
+            keys = keys_by_station.get((line, name))
+            if keys:
+                break
+        if not keys:
+            unmatched.append({'lineNm': row_value(row, 'lineNm'), 'stnNm': row_value(row, 'stnNm')})
+            continue
+        for key in keys:
+            by_key.setdefault(key, []).append(row)
+    return by_key, unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='수유실 API 행을 역 매핑 키에 연결')
+    parser.add_argument('--api-key', default=os.environ.get('SEOUL_API_KEY'),
+                        help='서울 열린데이터 API 키 (없으면 프록시 사용)')
+    parser.add_argument('--input', help='저장해 둔 API 응답(JSON) 파일')
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    else:
+        print("[API] 수유실 데이터 받는 중...")
+        payload = fetch_payload(args.api_key)
+
+    rows = seoul_api.extract_items(payload)
+    total = seoul_api.total_count(payload)
+    if total is not None and total > len(rows):
+        print(f"[경고] totalCount {total}개 중 {len(rows)}개만 받았습니다.")
+    index = station_index.load()
+    by_key, unmatched = join_rows(rows, index.verified())
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(by_key, f, ensure_ascii=False, separators=(',', ':'))
+    with open(UNMATCHED_FILE, 'w', encoding='utf-8') as f:
+        json.dump(unmatched, f, ensure_ascii=False, indent=4)
+
+    print("\n" + "="*50)
+    print(f"API 행: {len(rows)}개, 연결: {len(rows) - len(unmatched)}개, 미연결: {len(unmatched)}개")
+    print(f"수유실 정보가 있는 역(키): {len(by_key)}/{len(index.ok_keys)}개")
+    print("="*50)
+    for item in unmatched[:10]:
+        print(f"   [미연결] {item['lineNm']} {item['stnNm']}")
+    print(f"\n[저장] '{args.output}', 미연결 목록 '{UNMATCHED_FILE}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+역 이름 자동완성용 검색 인덱스 생성
+stations.json 과 station_prpr_mapping*.json 의 역명으로 아래 조회표를 미리 만들어 search_index.json 한 파일에 저장합니다.
+- prefix : 역명 앞부분          -> 역 번호 목록 ("강" -> 강남, 강동, ...)
+- cho    : 초성 앞부분          -> 역 번호 목록 ("ㄱㄴ" -> 강남, ...)
+- bigram : 연속한 두 글자       -> 역 번호 목록 (오타/중간 글자 검색용)
+prefix/cho 는 역 하나로 좁혀진 뒤의 긴 키를 생략하고, 목록은 미리 순위(짧은 이름 = 정확히 일치 우선, 안내도 있는 역 우선)대로 정렬해 MAX_RESULTS 개만 저장하므로
+index.html 은 입력 한 번에 조회 몇 번으로 결과를 얻습니다 (역 수가 늘어도 같음).
+
+사용법: python build_search_index.py [-o search_index.json]
+"""
+
+import argparse
+import json
+import re
+import sys
+
+import station_index
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+OUTPUT_FILE = 'search_index.json'
+MAX_RESULTS = 10
+
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+HANGUL_START = 0xAC00
+HANGUL_END = 0xD7A3
+
+
+def norm_name(name):
+    """검색용 역명: 공백 제거, 영문 소문자"""
+    return re.sub(r'\s+', '', str(name or '')).lower()
+
+
+def choseong(text):
+    """한글 음절은 초성으로 바꾸고 나머지 글자는 그대로 둡니다. ('강남' -> 'ㄱㄴ')"""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if HANGUL_START <= code <= HANGUL_END:
+            out.append(CHOSEONG[(code - HANGUL_START) // 588])
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def collect_stations(index):
+    """역명 -> {'lines': [노선명], 'keys': [매핑 키]} (stations.json 순서, 매핑에만 있는 역은 뒤에)"""
+    stations = {}
+    for name, info_list in index.stations.items():
+        entry = stations.setdefault(name, {'lines': [], 'keys': []})
+        for info in info_list:
+            line = info.get('lnNm') or info['lnCd']
+            if line not in entry['lines']:
+                entry['lines'].append(line)
+
+    for key, info in index.verified():
+        name = info['stinNm']
+        entry = stations.get(name) or stations.get(name + '역')
+        if entry is None:
+            entry = stations.setdefault(name, {'lines': [], 'keys': []})
+        entry['keys'].append(key)
+        if not entry['lines']:
+            entry['lines'].append(f"{info['lnCd']}호선")
+    return stations
+
+
+def build_index(stations):
+    names = list(stations)
+    norms = [norm_name(name) for name in names]
+
+    def rank(i):
+        # 짧을수록(정확히 일치) 먼저, 안내도가 있는 역 먼저, 그다음 가나다순
+        return (len(norms[i]), not stations[names[i]]['keys'], norms[i])
+
+    prefix = {}
+    cho = {}
+    bigram = {}
+    for i, norm in enumerate(norms):
+        cho_norm = choseong(norm)
+        for end in range(1, len(norm) + 1):
+            prefix.setdefault(norm[:end], []).append(i)
+            cho.setdefault(cho_norm[:end], []).append(i)
+        for gram in bigrams(norm):
+            bigram.setdefault(gram, []).append(i)
+
+    def ranked(table, limit=None):
+        return {k: sorted(ids, key=rank)[:limit] for k, ids in sorted(table.items())}
+
+    def trimmed(table):
+        # 바로 앞 글자에서 이미 역 하나로 좁혀진 키는 생략 (index.html 은 더 짧은 키로 찾아 앞부분을 비교)
+        return {k: ids for k, ids in table.items()
+                if not (len(ids) == 1 and len(table.get(k[:-1], ())) == 1)}
+
+    return {
+        'names': names,
+        'lines': [stations[name]['lines'] for name in names],
+        'keys': [stations[name]['keys'] for name in names],
+        'prefix': ranked(trimmed(prefix), MAX_RESULTS),
+        'cho': ranked(trimmed(cho), MAX_RESULTS),
+        'bigram': ranked(bigram)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='역 이름 자동완성 인덱스 생성')
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    index = station_index.load()
+    stations = collect_stations(index)
+    search = build_index(stations)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(search, f, ensure_ascii=False, separators=(',', ':'))
+
+    with_keys = sum(1 for keys in search['keys'] if keys)
+    print(f"역 {len(search['names'])}개 (안내도 있음 {with_keys}개)")
+    print(f"prefix {len(search['prefix'])}개, 초성 {len(search['cho'])}개, bigram {len(search['bigram'])}개")
+    print(f"[저장] '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
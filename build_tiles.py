@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+lightbox 확대용 타일 피라미드(deep zoom) 생성
+station_images/ 의 원본마다 station_tiles/{원본 해시}/{레벨}/{열}_{행}.webp 를 만듭니다.
+- 레벨 0 = 원본 해상도, 레벨이 하나 올라갈 때마다 가로/세로 절반
+- 마지막 레벨은 타일 하나(TILE_SIZE 이하)에 전체가 들어감
+index.html 의 lightbox는 image_tiles.json 을 읽어 현재 확대/이동 상태에서 보이는 타일만 요청합니다.
+
+사용법: python build_tiles.py [--workers N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from build_images import find_sources
+from image_store import file_sha256
+from kric_fetch import positive_int
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+OUT_DIR = 'station_tiles'
+METADATA_FILE = 'image_tiles.json'
+
+TILE_SIZE = 256
+TILE_QUALITY = 80
+
+
+def pyramid_levels(width, height, tile_size=TILE_SIZE):
+    """레벨 0(원본)부터 타일 하나에 들어갈 때까지 절반씩 줄인 레벨 목록"""
+    levels = []
+    scale = 1.0
+    while True:
+        w = max(1, round(width * scale))
+        h = max(1, round(height * scale))
+        levels.append({
+            'scale': scale,
+            'width': w,
+            'height': h,
+            'cols': -(-w // tile_size),
+            'rows': -(-h // tile_size)
+        })
+        if w <= tile_size and h <= tile_size:
+            return levels
+        scale /= 2
+
+
+def build_one(src_path, out_dir):
+    """원본 하나의 타일을 만들고 메타데이터를 돌려줍니다. 이미 만든 해시는 건너뜁니다."""
+    base = file_sha256(src_path)[:16]
+    tile_dir = os.path.join(out_dir, base)
+    done_file = os.path.join(tile_dir, 'tiles.json')
+    if os.path.exists(done_file):
+        with open(done_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    with Image.open(src_path) as opened:
+        im = opened.convert('RGBA')
+    levels = pyramid_levels(im.width, im.height)
+
+    level_im = im
+    for index, level in enumerate(levels):
+        if index:
+            level_im = level_im.resize((level['width'], level['height']), Image.Resampling.LANCZOS)
+        level_dir = os.path.join(tile_dir, str(index))
+        os.makedirs(level_dir, exist_ok=True)
+        for row in range(level['rows']):
+            for col in range(level['cols']):
+                box = (col * TILE_SIZE, row * TILE_SIZE,
+                       min((col + 1) * TILE_SIZE, level['width']),
+                       min((row + 1) * TILE_SIZE, level['height']))
+                level_im.crop(box).save(os.path.join(level_dir, f"{col}_{row}.webp"),
+                                        'WEBP', quality=TILE_QUALITY)
+
+    meta = {
+        'dir': f"{OUT_DIR}/{base}",
+        'width': im.width,
+        'height': im.height,
+        'tileSize': TILE_SIZE,
+        'levels': levels
+    }
+    # 모든 타일을 만든 뒤에 기록 (중간에 멈추면 다음 실행에서 다시 만듦)
+    with open(done_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='lightbox 확대용 타일 피라미드 생성')
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 1, help='프로세스 수')
+    args = parser.parse_args()
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    sources = find_sources()
+    print(f"[시작] {len(sources)}개 이미지 타일 생성 중 (프로세스 {args.workers}개)...")
+
+    tiles = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build_one, path, OUT_DIR): key for key, path in sources.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                tiles[key] = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"   [ERROR] {key}: {str(e)[:80]}")
+
+    with open(METADATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(tiles.items())), f, ensure_ascii=False, separators=(',', ':'))
+
+    # 더 이상 쓰지 않는 해시 폴더 정리
+    used = {os.path.basename(meta['dir']) for meta in tiles.values()}
+    removed = 0
+    for name in os.listdir(OUT_DIR):
+        if name not in used:
+            shutil.rmtree(os.path.join(OUT_DIR, name))
+            removed += 1
+
+    tile_count = sum(level['cols'] * level['rows'] for meta in tiles.values() for level in meta['levels'])
+    print("\n" + "="*50)
+    print(f"처리: {len(tiles)}개, 실패: {failed}개, 정리: {removed}개, 타일 {tile_count}개")
+    print(f"[저장] '{METADATA_FILE}', '{OUT_DIR}/'")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
 import sys
 
+from stations_etl import read_workbook
+
 if sys.platform == 'win32':
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
 
-# 엑셀 파일 읽기
-df = pd.read_excel('운영기관_역사_코드정보_2025.07.04.xlsx')
+# 엑셀 파일 읽기 (.xls/.xlsx, 파싱 결과 캐시 사용)
+df = read_workbook(sys.argv[1] if len(sys.argv) > 1 else '운영기관_역사_코드정보_2025.07.04.xls')
 
 print("[컬럼 목록]")
 for i, col in enumerate(df.columns.tolist(), 1):
@@ -2,15 +2,24 @@
 """
 KRIC 웹사이트에서 수유실 이미지를 크롤링하는 스크립트
 https://hc.kric.go.kr/hc/index.jsp
+- 운영기관마다 성공한 URL 패턴을 crawl_url_patterns.json 에 기억해 다음 역부터 그 패턴을 먼저 시도
+- 아는 패턴이 없으면 후보 패턴을 동시에 조회하고 처음 성공한 것만 사용 (아직 보내지 않은 나머지는 취소)
+- 역 단위로 동시에 크롤링 (kric_fetch.py 엔진: --workers / --rate / --http-cache)
+- 이미지 주소는 html_images.py 로 img 태그만 읽어 추출 (--parser 로 백엔드 선택)
+
+사용법: python crawl_nursing_room_images.py [--limit N] [--workers 8] [--rate 5] [--parser auto]
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
 import os
-import time
-from urllib.parse import urljoin
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import html_images
+import request_log
+from kric_fetch import FetchEngine, add_arguments
 
 # Windows 콘솔 인코딩 설정
 if sys.platform == 'win32':
@@ -21,6 +30,23 @@ if sys.platform == 'win32':
 # 설정
 BASE_URL = 'https://hc.kric.go.kr'
 IMAGES_DIR = 'nursing_room_images'
+PATTERNS_FILE = 'crawl_url_patterns.json'
+PAGE_MIN_LENGTH = 1000
+
+# 역 편의시설 페이지 후보 URL 패턴
+URL_PATTERNS = {
+    'stationInfo': BASE_URL + '/hc/stationInfo.do?railOprIsttCd={rail}&lnCd={ln}&stinCd={stin}',
+    'station': BASE_URL + '/hc/station.do?railOprIsttCd={rail}&lnCd={ln}&stinCd={stin}',
+    'convFacility': BASE_URL + '/hc/convFacility.do?railOprIsttCd={rail}&lnCd={ln}&stinCd={stin}',
+    'stationCnvFacl': BASE_URL + '/hc/stationCnvFacl.do?railOprIsttCd={rail}&lnCd={ln}&stinCd={stin}',
+}
+
+parser = add_arguments(argparse.ArgumentParser(description='KRIC 역 편의시설 페이지에서 수유실 이미지 크롤링'))
+parser.add_argument('--limit', type=int, help='처음 N개 역만 조회 (기본: 전체)')
+parser.add_argument('--parser', default='auto', choices=['auto'] + list(html_images.BACKENDS),
+                    help='이미지 추출 백엔드 (기본 auto: 설치된 것 중 가장 빠른 것)')
+args = parser.parse_args()
+parser_backend = html_images.resolve_backend(args.parser)
 
 # 이미지 저장 폴더 생성
 if not os.path.exists(IMAGES_DIR):
@@ -34,78 +60,147 @@ with open('stations.json', 'r', encoding='utf-8') as f:
 
 print(f"[완료] 총 {len(stations_data)}개의 역 정보를 로드했습니다.\n")
 
-# 세션 생성 (쿠키 유지)
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-})
+# 요청 엔진 (스레드마다 세션/쿠키 유지, 호스트별 속도 제한, 디스크 캐시)
+engine = FetchEngine.from_args(args)
+# 패턴 후보를 동시에 조회하는 풀 (역 단위 풀과 별도)
+probe_pool = ThreadPoolExecutor(max_workers=max(len(URL_PATTERNS), args.workers))
+
+# 운영기관 -> 성공한 패턴 이름
+learned_patterns = {}
+if os.path.exists(PATTERNS_FILE):
+    with open(PATTERNS_FILE, 'r', encoding='utf-8') as f:
+        learned_patterns = json.load(f)
+patterns_lock = threading.Lock()
+
+
+def fetch_page(pattern_name, rail_code, line_code, station_code, cancelled=None):
+    """패턴 하나로 페이지를 조회합니다. 성공하면 (HTML, URL), 아니면 None."""
+    if cancelled is not None and cancelled.is_set():
+        return None
+    url = URL_PATTERNS[pattern_name].format(rail=rail_code, ln=line_code, stin=station_code)
+    try:
+        # 후보 패턴 조회는 별도 풀에서 돌기 때문에 역 키를 여기서 지정
+        with request_log.context(station=f"{rail_code}_{line_code}_{station_code}"):
+            response = engine.get(url, timeout=10)
+        if response.status_code == 200 and len(response.text) > PAGE_MIN_LENGTH:
+            return response.text, url
+    except Exception as e:
+        print(f"   [WARN] {url} 실패: {str(e)[:50]}")
+    return None
+
+
+def probe_patterns(pattern_names, rail_code, line_code, station_code):
+    """
+    여러 패턴을 동시에 조회해 처음 성공한 (패턴 이름, HTML, URL)을 돌려줍니다.
+    성공하면 아직 시작하지 않은 조회는 취소하고, 이미 보낸 요청은 기다리지 않습니다.
+    """
+    cancelled = threading.Event()
+    futures = {probe_pool.submit(fetch_page, name, rail_code, line_code, station_code, cancelled): name
+               for name in pattern_names}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found = future.result()
+                if found:
+                    return (futures[future],) + found
+        return None
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+
 
 def get_station_facility_page(station_name, rail_code, line_code, station_code):
-    """특정 역의 편의시설 페이지를 가져옵니다."""
-    
-    # 가능한 URL 패턴들을 시도
-    url_patterns = [
-        f"{BASE_URL}/hc/stationInfo.do?railOprIsttCd={rail_code}&lnCd={line_code}&stinCd={station_code}",
-        f"{BASE_URL}/hc/station.do?railOprIsttCd={rail_code}&lnCd={line_code}&stinCd={station_code}",
-        f"{BASE_URL}/hc/convFacility.do?railOprIsttCd={rail_code}&lnCd={line_code}&stinCd={station_code}",
-        f"{BASE_URL}/hc/stationCnvFacl.do?railOprIsttCd={rail_code}&lnCd={line_code}&stinCd={station_code}",
-    ]
-    
-    print(f"[검색] {station_name} 페이지 조회 중...")
-    
-    for url in url_patterns:
-        try:
-            response = session.get(url, timeout=10)
-            if response.status_code == 200 and len(response.text) > 1000:
-                print(f"   [OK] URL 발견: {url}")
-                return response.text, url
-        except Exception as e:
-            print(f"   [WARN] {url} 실패: {str(e)[:50]}")
-            continue
-    
-    return None, None
+    """특정 역의 편의시설 페이지를 가져옵니다. 운영기관별로 성공한 패턴을 먼저 시도합니다."""
+    with patterns_lock:
+        known = learned_patterns.get(rail_code)
+
+    found = None
+    if known in URL_PATTERNS:
+        page = fetch_page(known, rail_code, line_code, station_code)
+        if page:
+            found = (known,) + page
+    if found is None:
+        others = [name for name in URL_PATTERNS if name != known]
+        found = probe_patterns(others, rail_code, line_code, station_code)
+    if found is None:
+        return None, None
+
+    pattern_name, html_content, url = found
+    if pattern_name != known:
+        with patterns_lock:
+            learned_patterns[rail_code] = pattern_name
+        print(f"   [학습] {rail_code}: '{pattern_name}' 패턴 사용 ({station_name})")
+    return html_content, url
+
 
 def extract_images_from_html(html_content, base_url):
-    """HTML에서 이미지 URL을 추출합니다."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    image_urls = []
-    
-    # 모든 이미지 태그 찾기
-    images = soup.find_all('img')
-    
-    for img in images:
-        src = img.get('src') or img.get('data-src')
-        if src:
-            full_url = urljoin(base_url, src)
-            # 작은 아이콘이나 로고 제외 (파일 크기 기준)
-            if not any(x in full_url.lower() for x in ['icon', 'logo', 'btn', 'arrow']):
-                image_urls.append({
-                    'url': full_url,
-                    'alt': img.get('alt', ''),
-                    'title': img.get('title', '')
-                })
-    
-    return image_urls
+    """HTML에서 이미지 URL을 추출합니다. (아이콘/로고/버튼/화살표는 추출하면서 제외)"""
+    return html_images.extract_images(html_content, base_url, parser_backend)
+
 
 def download_image(image_url, save_path):
     """이미지를 다운로드합니다."""
     try:
-        response = session.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # 파일 크기가 너무 작으면 스킵 (아이콘일 가능성)
-        if len(response.content) < 1024:  # 1KB 미만
-            return False
-            
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        
-        return True
+        # 파일 크기가 너무 작으면 스킵 (아이콘일 가능성, 1KB 미만)
+        # 임시 파일에 받은 뒤 완료되면 제자리로 교체
+        return engine.download(image_url, save_path, min_bytes=1024, timeout=10) is not None
     except Exception as e:
         print(f"   [ERROR] 이미지 다운로드 실패: {str(e)[:50]}")
         return False
 
+
+def crawl_station(job):
+    """역 하나: 페이지 조회 -> 이미지 추출 -> 다운로드. (결과, 발견한 이미지 수, HTML) 를 돌려줍니다."""
+    index, station_name, station_info = job
+    rail_code = station_info['railOprIsttCd']
+    line_code = station_info['lnCd']
+    station_code = station_info['stinCd']
+    line_name = station_info.get('lnNm', line_code)
+
+    # 웹 페이지 가져오기
+    html_content, page_url = get_station_facility_page(
+        station_name, rail_code, line_code, station_code
+    )
+    if not html_content:
+        print(f"[FAIL] {station_name} ({line_name}): 페이지를 찾을 수 없습니다.")
+        return None, 0, None
+
+    # 이미지 추출
+    images = extract_images_from_html(html_content, BASE_URL)
+    station_result = {
+        'station_name': station_name,
+        'line_name': line_name,
+        'page_url': page_url,
+        'images': []
+    }
+    if not images:
+        print(f"[없음] {station_name} ({line_name}): 이미지를 찾을 수 없습니다.")
+        return station_result, 0, html_content
+
+    # 이미지 다운로드
+    safe_station_name = station_name.replace('/', '_').replace('\\', '_')
+    safe_line_name = line_name.replace('/', '_').replace('\\', '_')
+    for idx, img_info in enumerate(images):
+        img_url = img_info['url']
+        ext = os.path.splitext(img_url)[1][:5] or '.jpg'  # 확장자 길이 제한
+        filename = f"{safe_station_name}_{safe_line_name}_{idx+1}{ext}"
+        filepath = os.path.join(IMAGES_DIR, filename)
+        with request_log.context(station=f"{rail_code}_{line_code}_{station_code}"):
+            saved = download_image(img_url, filepath)
+        if saved:
+            station_result['images'].append({
+                'filename': filename,
+                'url': img_url,
+                'alt': img_info['alt']
+            })
+
+    print(f"[역] {station_name} ({line_name}): 이미지 {len(images)}개 중 {len(station_result['images'])}개 저장")
+    return station_result, len(images), html_content
+
+
 # 메인 실행
 results = {
     'total_checked': 0,
@@ -115,87 +210,49 @@ results = {
     'stations': []
 }
 
-# 테스트: 몇 개의 역만 먼저 시도
-test_limit = 3
-test_stations = list(stations_data.items())[:test_limit]
+# 각 역의 첫 번째 호선만 조회
+jobs = [(index, station_name, station_info_list[0])
+        for index, (station_name, station_info_list) in enumerate(stations_data.items())]
+if args.limit:
+    jobs = jobs[:args.limit]
 
-print(f"\n[테스트] 처음 {test_limit}개 역만 조회합니다.\n")
+print(f"[시작] {len(jobs)}개 역 조회 (동시 {engine.workers}개, 알려진 패턴 {len(learned_patterns)}개, "
+      f"추출 {parser_backend})\n")
 
-for station_name, station_info_list in test_stations:
-    # 각 역의 첫 번째 호선만 조회
-    station_info = station_info_list[0]
+finished = {}
+sample = None   # (순번, HTML) - 입력 순서가 가장 앞선 역의 페이지 하나만 보관
+for job, result, error in engine.map(crawl_station, jobs):
     results['total_checked'] += 1
-    
-    rail_code = station_info['railOprIsttCd']
-    line_code = station_info['lnCd']
-    station_code = station_info['stinCd']
-    line_name = station_info.get('lnNm', line_code)
-    
-    print(f"\n[역] {station_name} ({line_name})")
-    
-    # 웹 페이지 가져오기
-    html_content, page_url = get_station_facility_page(
-        station_name, rail_code, line_code, station_code
-    )
-    
-    if not html_content:
-        print(f"   [FAIL] 페이지를 찾을 수 없습니다.")
+    if error is not None:
+        print(f"[ERROR] {job[1]}: {str(error)[:80]}")
+        continue
+    station_result, images_found, html_content = result
+    if station_result is None:
         continue
-    
     results['pages_found'] += 1
-    
-    # 이미지 추출
-    images = extract_images_from_html(html_content, BASE_URL)
-    
-    if images:
-        print(f"   [발견] {len(images)}개의 이미지")
-        results['images_found'] += len(images)
-        
-        station_result = {
-            'station_name': station_name,
-            'line_name': line_name,
-            'page_url': page_url,
-            'images': []
-        }
-        
-        # 이미지 다운로드
-        for idx, img_info in enumerate(images):
-            img_url = img_info['url']
-            
-            # 파일명 생성
-            safe_station_name = station_name.replace('/', '_').replace('\\', '_')
-            safe_line_name = line_name.replace('/', '_').replace('\\', '_')
-            
-            ext = os.path.splitext(img_url)[1][:5] or '.jpg'  # 확장자 길이 제한
-            filename = f"{safe_station_name}_{safe_line_name}_{idx+1}{ext}"
-            filepath = os.path.join(IMAGES_DIR, filename)
-            
-            print(f"   [다운] {filename}...", end=' ')
-            
-            if download_image(img_url, filepath):
-                print("[OK]")
-                results['images_downloaded'] += 1
-                station_result['images'].append({
-                    'filename': filename,
-                    'url': img_url,
-                    'alt': img_info['alt']
-                })
-            else:
-                print("[SKIP]")
-        
+    results['images_found'] += images_found
+    results['images_downloaded'] += len(station_result['images'])
+    finished[job[0]] = (station_result, images_found)
+    if sample is None or job[0] < sample[0]:
+        sample = (job[0], html_content)
+
+probe_pool.shutdown(wait=False, cancel_futures=True)
+
+# 입력 순서대로 정리
+for index in sorted(finished):
+    station_result, images_found = finished[index]
+    if images_found:
         results['stations'].append(station_result)
-    else:
-        print(f"   [없음] 이미지를 찾을 수 없습니다.")
-    
-    # 첫 번째 역의 HTML 저장
-    if results['total_checked'] == 1:
-        html_file = 'sample_page.html'
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"   [저장] HTML을 '{html_file}'에 저장했습니다.")
-    
-    # 요청 간 딜레이
-    time.sleep(1)
+
+# 첫 번째로 찾은 역의 HTML 저장
+if sample is not None:
+    html_file = 'sample_page.html'
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(sample[1])
+    print(f"\n[저장] HTML을 '{html_file}'에 저장했습니다.")
+
+with open(PATTERNS_FILE, 'w', encoding='utf-8') as f:
+    json.dump(dict(sorted(learned_patterns.items())), f, ensure_ascii=False, indent=4)
 
 # 결과 저장
 print("\n" + "="*60)
@@ -205,6 +262,10 @@ print(f"조회한 역: {results['total_checked']}개")
 print(f"페이지 발견: {results['pages_found']}개")
 print(f"발견한 이미지: {results['images_found']}개")
 print(f"다운로드한 이미지: {results['images_downloaded']}개")
+if engine.cache is not None:
+    print(engine.cache.summary())
+if engine.log is not None:
+    print(engine.log.summary())
 print("="*60)
 
 # 결과를 JSON으로 저장
@@ -214,4 +275,5 @@ with open(result_file, 'w', encoding='utf-8') as f:
 
 print(f"\n[완료] 결과가 '{result_file}'에 저장되었습니다.")
 print(f"[완료] 이미지는 '{IMAGES_DIR}' 폴더에 저장되었습니다.")
+print(f"[학습] 운영기관별 URL 패턴을 '{PATTERNS_FILE}'에 저장했습니다.")
 print(f"[힌트] 'sample_page.html'을 열어서 웹사이트 구조를 확인하세요.")
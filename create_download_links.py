@@ -4,28 +4,27 @@ station_prpr_mapping_ok.json 기준으로 이미지 다운로드 링크 HTML 생
 브라우저에서 이 HTML을 열고, '한 번에 링크 열기' 또는 각 링크를 클릭해 저장하면 됨.
 """
 
-import json
-import os
 import sys
 
+import station_index
+
 if sys.platform == 'win32':
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
 
 BASE_URL = 'https://hc.kric.go.kr/hc/ext/images/visual/handicapped/cnv'
-MAPPING_FILE = 'station_prpr_mapping_ok.json'
 OUT_HTML = 'download_image_links.html'
 
-with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
-    mapping = json.load(f)
+# station_prpr_mapping_ok.json 의 검증된 매핑만 사용
+mapping = station_index.load().verified()
 
 rows = []
-for key, info in mapping.items():
+for key, info in mapping:
     rail = info['railOprIsttCd']
     ln = info['lnCd']
     prpr = info['prprStinCd']
     name = info['stinNm']
-    url = f"{BASE_URL}/{rail}/{rail}_{ln}_{prpr}.png"
+    url = f"{BASE_URL}/{rail}/{station_index.image_filename(rail, ln, prpr)}"
     safe_name = name.replace('/', '_').replace('\\', '_')
     filename = f"{safe_name}_{rail}_{ln}.png"
     rows.append(f'  <a data-link="station" href="{url}" download="{filename}" target="_blank">{name} ({rail}_{ln})</a>')
@@ -3,13 +3,20 @@
 역 이미지 다운로드 스크립트 (매핑 파일 사용)
 1. 먼저 browser_console_script.js를 브라우저에서 실행해서 station_prpr_mapping.json 생성
 2. 이 스크립트를 실행하면 해당 매핑을 사용해서 이미지 다운로드
+   (kric_fetch.py 엔진으로 병렬 다운로드, --workers / --rate 로 조절)
+   매핑이 없어 원본 코드로 추측한 주소가 많으므로 HEAD/Range 로 먼저 있는지 확인하고
+   있는 것만 받음 (image_probe.py, --no-probe 로 끄기)
 """
 
-import requests
+import argparse
 import json
 import os
 import sys
 
+import image_probe
+import station_index
+from kric_fetch import FetchEngine, add_arguments
+
 # Windows 콘솔 인코딩 설정
 if sys.platform == 'win32':
     import codecs
@@ -21,53 +28,34 @@ BASE_URL = 'https://hc.kric.go.kr'
 IMAGE_BASE = '/hc/ext/images/visual/handicapped/cnv'
 IMAGES_DIR = 'station_images'
 
+parser = add_arguments(argparse.ArgumentParser(description='매핑 파일을 사용한 역 이미지 다운로드'))
+image_probe.add_arguments(parser)
+args = parser.parse_args()
+
 # 이미지 저장 폴더 생성
 if not os.path.exists(IMAGES_DIR):
     os.makedirs(IMAGES_DIR)
     print(f"[생성] '{IMAGES_DIR}' 폴더를 생성했습니다.\n")
 
-# stations.json 파일 로드
-print("[로드] stations.json 파일 읽는 중...")
-with open('stations.json', 'r', encoding='utf-8') as f:
-    stations_data = json.load(f)
-print(f"[OK] {len(stations_data)}개 역 정보 로드\n")
-
-# station_prpr_mapping.json 파일 로드
-mapping_file = 'station_prpr_mapping.json'
-if os.path.exists(mapping_file):
-    print(f"[로드] {mapping_file} 파일 읽는 중...")
-    with open(mapping_file, 'r', encoding='utf-8') as f:
-        prpr_mapping = json.load(f)
-    print(f"[OK] {len(prpr_mapping)}개 매핑 정보 로드\n")
+# stations.json + station_prpr_mapping*.json 로드 (station_index.py)
+print("[로드] 역 정보 / 매핑 파일 읽는 중...")
+index = station_index.load()
+stations_data = index.stations
+print(f"[OK] {len(stations_data)}개 역 정보 로드")
+if index.mapping:
+    print(f"[OK] {len(index.mapping)}개 매핑 정보 로드\n")
 else:
-    print(f"[경고] {mapping_file} 파일이 없습니다!")
+    print(f"[경고] {station_index.MAPPING_FILE} 파일이 없습니다!")
     print(f"[안내] 먼저 browser_console_script.js를 브라우저에서 실행하세요.\n")
-    prpr_mapping = {}
 
-# 세션 생성
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Referer': 'https://hc.kric.go.kr/hc/index.jsp'
-})
+# 요청 엔진 생성 (동시 요청 수 + 호스트별 속도 제한)
+engine = FetchEngine.from_args(args)
 
 def download_image(image_url, save_path):
-    """이미지를 다운로드합니다."""
+    """이미지를 임시 파일로 스트리밍 다운로드한 뒤 제자리로 교체합니다."""
     try:
-        response = session.get(image_url, timeout=10)
-        
-        if response.status_code != 200:
-            return False
-            
-        # 파일 크기 확인 (너무 작으면 에러 이미지일 가능성)
-        if len(response.content) < 500:
-            return False
-            
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        
-        return True
-        
+        # 404나 다른 에러, 500바이트 미만(에러 이미지)은 건너뜀
+        return engine.download(image_url, save_path, min_bytes=500, timeout=10) is not None
     except Exception:
         return False
 
@@ -80,7 +68,8 @@ results = {
 
 print("[시작] 이미지 다운로드 중...\n")
 
-# 각 역에 대해 처리
+# 각 역에 대해 다운로드 작업 생성
+jobs = []
 for station_name, station_info_list in stations_data.items():
     for station_info in station_info_list:
         results['total_checked'] += 1
@@ -90,35 +79,49 @@ for station_name, station_info_list in stations_data.items():
         station_code = station_info['stinCd']
         line_name = station_info.get('lnNm', line_code)
         
-        # prprStinCd 찾기
-        mapping_key = f"{rail_code}_{line_code}_{station_name}"
-        
-        if mapping_key in prpr_mapping:
-            prpr_stin_cd = prpr_mapping[mapping_key]['prprStinCd']
-        else:
-            # 매핑이 없으면 원본 코드로 시도
-            prpr_stin_cd = station_code
+        # prprStinCd 찾기 (매핑이 없으면 원본 코드로 시도)
+        prpr_stin_cd = index.prpr_for(rail_code, line_code, station_code) or station_code
         
         # 이미지 URL 생성
-        image_url = f"{BASE_URL}{IMAGE_BASE}/{rail_code}/{rail_code}_{line_code}_{prpr_stin_cd}.png"
+        image_url = f"{BASE_URL}{IMAGE_BASE}/{rail_code}/{station_index.image_filename(rail_code, line_code, prpr_stin_cd)}"
         
         # 파일명 생성
         safe_station_name = station_name.replace('/', '_').replace('\\', '_')
         safe_line_name = line_name.replace('/', '_').replace('\\', '_')
         filename = f"{safe_station_name}_{safe_line_name}.png"
-        filepath = os.path.join(IMAGES_DIR, filename)
         
-        # 이미지 다운로드 시도
-        if download_image(image_url, filepath):
-            results['images_downloaded'] += 1
-            
-            # 진행 상황 출력 (50개마다)
-            if results['images_downloaded'] % 50 == 0:
-                print(f"[진행] {results['images_downloaded']}개 이미지 다운로드 완료")
-            
-            # 처음 10개는 상세 정보 출력
-            if results['images_downloaded'] <= 10:
-                print(f"[+] {station_name} ({line_name}) -> {filename}")
+        jobs.append({
+            'station_name': station_name,
+            'line_name': line_name,
+            'url': image_url,
+            'filename': filename
+        })
+
+
+def fetch_image(job):
+    return download_image(job['url'], os.path.join(IMAGES_DIR, job['filename']))
+
+
+# 이미지가 있는 주소만 골라 병렬 다운로드
+if not args.no_probe:
+    probe = image_probe.ImageProbe(refresh=args.refresh_probe)
+    print(f"[프로브] {len(jobs)}개 이미지 주소 확인 중 (HEAD / Range)...")
+    existence = probe.probe_all(engine, [job['url'] for job in jobs])
+    print(probe.summary(existence) + "\n")
+    jobs = [job for job in jobs if existence[job['url']]]
+
+for job, ok, error in engine.map(fetch_image, jobs):
+    if not ok:
+        continue
+    results['images_downloaded'] += 1
+    
+    # 진행 상황 출력 (50개마다)
+    if results['images_downloaded'] % 50 == 0:
+        print(f"[진행] {results['images_downloaded']}개 이미지 다운로드 완료")
+    
+    # 처음 10개는 상세 정보 출력
+    if results['images_downloaded'] <= 10:
+        print(f"[+] {job['station_name']} ({job['line_name']}) -> {job['filename']}")
 
 # 최종 결과
 print("\n" + "="*60)
@@ -2,13 +2,25 @@
 """
 station_prpr_mapping_ok.json에 있는 역들의 편의시설 이미지를 일괄 다운로드
 URL: https://hc.kric.go.kr/hc/ext/images/visual/handicapped/cnv/{railOprIsttCd}/{railOprIsttCd}_{lnCd}_{prprStinCd}.png
+동시 요청 수와 호스트당 초당 요청 수는 --workers / --rate 로 조절 (kric_fetch.py)
+--sync: image_manifest.json 기준 조건부 요청으로 바뀐 이미지만 저장 (image_manifest.py)
+--store: 해시 이름 저장소(image_store.py)에 한 번만 저장하고 station_images 는 인덱스로 다시 만듦
+--retry-failed: download_failed.txt 에 있는 이미지만 다시 받기
+    일시적 실패(5xx/429, 연결 오류)는 지터를 넣은 지수 백오프로 --attempts 번까지 재시도하고,
+    호스트가 계속 실패하면 차단기가 요청을 멈췄다가 일정 시간 뒤 하나만 시험해 봄 (kric_fetch.CircuitBreaker)
 """
 
-import requests
-import json
+import argparse
+import functools
 import os
 import sys
-import time
+
+import image_manifest
+import request_log
+import station_index
+from image_store import ImageStore
+from kric_fetch import (RETRY_ATTEMPTS, FetchEngine, HostCircuitBreakers, add_arguments, positive_int,
+                        with_retry)
 
 if sys.platform == 'win32':
     import codecs
@@ -17,57 +29,152 @@ if sys.platform == 'win32':
 
 BASE_URL = 'https://hc.kric.go.kr/hc/ext/images/visual/handicapped/cnv'
 IMAGES_DIR = 'station_images'
-MAPPING_FILE = 'station_prpr_mapping_ok.json'
+FAILED_FILE = 'download_failed.txt'
 
-os.makedirs(IMAGES_DIR, exist_ok=True)
+parser = add_arguments(argparse.ArgumentParser(description='매핑 파일 기준 역 이미지 일괄 다운로드'))
+parser.add_argument('--sync', action='store_true',
+                    help='ETag/Last-Modified 매니페스트로 바뀐 이미지만 받기')
+parser.add_argument('--store', action='store_true',
+                    help='내용 주소 저장소(image_store/)에 저장하고 station_images 를 다시 만들기')
+parser.add_argument('--retry-failed', action='store_true',
+                    help=f'{FAILED_FILE} 의 이미지만 백오프/호스트 차단기와 함께 다시 받기')
+parser.add_argument('--attempts', type=positive_int, default=RETRY_ATTEMPTS,
+                    help=f'--retry-failed 에서 이미지당 최대 시도 횟수 (기본 {RETRY_ATTEMPTS})')
+args = parser.parse_args()
+if args.retry_failed and args.sync:
+    parser.error('--retry-failed 는 --sync 와 함께 쓸 수 없습니다.')
 
-with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
-    mapping = json.load(f)
+os.makedirs(IMAGES_DIR, exist_ok=True)
 
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Referer': 'https://hc.kric.go.kr/hc/index.jsp'
-})
+# station_prpr_mapping_ok.json 의 검증된 매핑만 사용
+mapping = station_index.load().verified()
 
-total = len(mapping)
-downloaded = 0
-failed = []
+engine = FetchEngine.from_args(args, breakers=HostCircuitBreakers() if args.retry_failed else None)
 
-for key, info in mapping.items():
+jobs = []
+for key, info in mapping:
     rail = info['railOprIsttCd']
     ln = info['lnCd']
     prpr = info['prprStinCd']
     name = info['stinNm']
 
-    image_url = f"{BASE_URL}/{rail}/{rail}_{ln}_{prpr}.png"
+    image_url = f"{BASE_URL}/{rail}/{station_index.image_filename(rail, ln, prpr)}"
     safe_name = name.replace('/', '_').replace('\\', '_')
     filename = f"{safe_name}_{rail}_{ln}.png"
-    filepath = os.path.join(IMAGES_DIR, filename)
+    jobs.append({
+        'index': len(jobs),
+        'key': key,
+        'source_file': station_index.image_filename(rail, ln, prpr),
+        'name': name,
+        'rail': rail,
+        'ln': ln,
+        'url': image_url,
+        'filepath': os.path.join(IMAGES_DIR, filename)
+    })
+
+# 실패 목록에 있는 이미지만 (현재 매핑에 없는 줄은 그대로 남김)
+unknown_failed = []
+if args.retry_failed:
+    if not os.path.exists(FAILED_FILE):
+        print(f"[완료] '{FAILED_FILE}'이 없습니다. 다시 받을 이미지가 없습니다.")
+        sys.exit(0)
+    with open(FAILED_FILE, 'r', encoding='utf-8') as f:
+        failed_lines = [line.rstrip('\n') for line in f if line.strip()]
+    known_urls = {job['url'] for job in jobs}
+    failed_urls = {line.split('\t')[-1] for line in failed_lines}
+    unknown_failed = [line for line in failed_lines if line.split('\t')[-1] not in known_urls]
+    jobs = [job for job in jobs if job['url'] in failed_urls]
+    print(f"[재시도] '{FAILED_FILE}' {len(failed_lines)}개 중 {len(jobs)}개 다시 받기 "
+          f"(매핑에 없음 {len(unknown_failed)}개, 최대 {args.attempts}회)")
+
+
+def fetch(job):
+    # 500바이트 미만은 에러 이미지로 보고 저장하지 않음 (받는 도중에 판단)
+    with request_log.context(station=job['key']):
+        return engine.download(job['url'], job['filepath'], min_bytes=500, timeout=image_manifest.TIMEOUT) is not None
+
+
+def fetch_to_store(job):
+    # 임시 파일로 받은 뒤 해시 이름으로 옮김 (같은 내용이면 새로 저장하지 않음)
+    tmp_path = os.path.join(store.root, f".{job['index']}.download")
+    with request_log.context(station=job['key']):
+        result = engine.download(job['url'], tmp_path, min_bytes=500, timeout=image_manifest.TIMEOUT)
+    if result is None:
+        return False
+    store.add_file(tmp_path, sha256=result.sha256, move=True)
+    store.set_key(job['key'], result.sha256, job['source_file'])
+    return True
 
-    try:
-        r = session.get(image_url, timeout=15)
-        if r.status_code == 200 and len(r.content) >= 500:
-            with open(filepath, 'wb') as f:
-                f.write(r.content)
+
+def retried(task, job):
+    # 지터 지수 백오프 재시도 (차단 중인 호스트는 차단이 풀릴 때까지 기다림)
+    return with_retry(lambda: task(job), args.attempts)
+
+
+def sync(job):
+    with request_log.context(station=job['key']):
+        return manifest.sync(engine, job['key'], job['url'], job['filepath'], timeout=image_manifest.TIMEOUT)
+
+
+total = len(jobs)
+downloaded = 0
+failed = []
+
+if args.sync:
+    manifest = image_manifest.ImageManifest()
+    counts = {status: 0 for status in (image_manifest.UNCHANGED, image_manifest.UPDATED,
+                                       image_manifest.NEW, image_manifest.GONE)}
+    for job, status, error in engine.map(sync, jobs):
+        if status in counts:
+            counts[status] += 1
+            if status in (image_manifest.UPDATED, image_manifest.NEW):
+                print(f"[{status.upper()}] {job['name']} ({job['rail']}_{job['ln']})")
+        else:
+            failed.append(job)
+    counts[image_manifest.GONE] += len(manifest.drop_missing(job['key'] for job in jobs))
+    manifest.save()
+    downloaded = counts[image_manifest.UPDATED] + counts[image_manifest.NEW]
+else:
+    store = ImageStore() if args.store else None
+    task = fetch_to_store if store else fetch
+    if args.retry_failed:
+        task = functools.partial(retried, task)
+    for job, ok, error in engine.map(task, jobs):
+        if ok:
             downloaded += 1
             if downloaded % 20 == 0 or downloaded <= 5:
-                print(f"[OK] {downloaded}/{total} {name} ({rail}_{ln})")
+                print(f"[OK] {downloaded}/{total} {job['name']} ({job['rail']}_{job['ln']})")
         else:
-            failed.append((name, image_url))
-    except Exception as e:
-        failed.append((name, image_url))
+            failed.append(job)
+    if store:
+        store.save()
+        written, _ = store.build_view(IMAGES_DIR)
+        objects = len({entry['sha256'] for entry in store.index.values()})
+        print(f"[저장소] 키 {len(store.index)}개 / 객체 {objects}개, 이름 갱신 {written}개")
 
-    time.sleep(0.3)
+# 실패 목록은 매핑 파일 순서대로 기록
+failed.sort(key=lambda job: job['index'])
 
 print("\n" + "="*50)
 print(f"다운로드 완료: {downloaded}/{total}")
+if args.sync:
+    print(f"변경 없음: {counts['unchanged']}개, 갱신: {counts['updated']}개, "
+          f"신규: {counts['new']}개, 삭제: {counts['gone']}개")
 print(f"실패: {len(failed)}개")
+if engine.breakers is not None:
+    print(engine.breakers.summary())
+if engine.log is not None:
+    print(engine.log.summary())
 print("="*50)
 print(f"이미지 저장 위치: {os.path.abspath(IMAGES_DIR)}")
 
-if failed:
-    with open('download_failed.txt', 'w', encoding='utf-8') as f:
-        for name, url in failed:
-            f.write(f"{name}\t{url}\n")
-    print(f"실패 목록: download_failed.txt")
+if failed or unknown_failed:
+    with open(FAILED_FILE, 'w', encoding='utf-8') as f:
+        for job in failed:
+            f.write(f"{job['name']}\t{job['url']}\n")
+        for line in unknown_failed:
+            f.write(line + '\n')
+    print(f"실패 목록: {FAILED_FILE}")
+elif args.retry_failed:
+    os.remove(FAILED_FILE)
+    print(f"[완료] 모두 받아서 '{FAILED_FILE}'을 지웠습니다.")
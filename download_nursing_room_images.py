@@ -1,13 +1,24 @@
-import requests
+import argparse
 import json
 import os
-import time
 from urllib.parse import urlparse
 
+import request_log
+from kric_fetch import AdaptiveConcurrency, FetchEngine, add_arguments, stream_to_file
+
 # 설정
 SERVICE_KEY = 'YOUR_SERVICE_KEY_HERE'  # 여기에 본인의 서비스 키를 입력하세요
 API_BASE_URL = 'https://openapi.kric.go.kr/openapi/convenientInfo/stationDairyRoom'
 IMAGES_DIR = 'nursing_room_images'  # 이미지 저장 폴더
+RESULT_FILE = 'nursing_room_results.json'
+# 끝난 (운영기관, 노선, 역)을 한 줄씩 덧붙이는 체크포인트 - 다시 실행하면 여기 있는 역은 건너뜀
+CHECKPOINT_FILE = 'nursing_room_checkpoint.jsonl'
+
+parser = add_arguments(argparse.ArgumentParser(description='KRIC 수유실 API 조회 + 이미지 다운로드 (이어받기 지원)'))
+parser.add_argument('--min-workers', type=int, default=1, help='동시 요청 수 하한 (기본 1, 상한은 --workers)')
+parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help=f'체크포인트 파일 (기본 {CHECKPOINT_FILE})')
+parser.add_argument('--restart', action='store_true', help='체크포인트를 지우고 처음부터 조회')
+args = parser.parse_args()
 
 # 이미지 저장 폴더 생성
 if not os.path.exists(IMAGES_DIR):
@@ -21,7 +32,188 @@ with open('stations.json', 'r', encoding='utf-8') as f:
 
 print(f"✅ 총 {len(stations_data)}개의 역 정보를 로드했습니다.\n")
 
-# 결과 저장용
+# 요청 엔진 (호스트별 속도 제한 --rate, 디스크 HTTP 캐시 --http-cache / KRIC_HTTP_CACHE)
+engine = FetchEngine.from_args(args, headers={})
+# 지연 시간/오류율에 따라 동시 요청 수를 --min-workers ~ --workers 사이에서 조절
+controller = AdaptiveConcurrency(args.workers, args.min_workers)
+
+
+def station_key(station_info):
+    return f"{station_info['railOprIsttCd']}_{station_info['lnCd']}_{station_info['stinCd']}"
+
+
+def load_checkpoint(path):
+    """체크포인트의 역별 마지막 기록. 중단될 때 잘린 마지막 줄은 무시합니다."""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry['key']] = entry
+    return entries
+
+
+def open_checkpoint(path):
+    """덧붙이기 모드로 엽니다. 마지막 줄이 잘려 있으면 줄바꿈부터 넣습니다."""
+    needs_newline = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    journal = open(path, 'a', encoding='utf-8')
+    if needs_newline:
+        journal.write('\n')
+    return journal
+
+
+def download_room_image(image_url, filepath):
+    # 임시 파일에 스트리밍 저장 후 완료되면 제자리로 교체
+    with engine.get(image_url, timeout=10, stream=True) as img_response:
+        img_response.raise_for_status()
+        stream_to_file(img_response, filepath)
+
+
+def crawl_station(job):
+    """역(노선) 하나: API 조회 -> 수유실 이미지 다운로드. 체크포인트에 쓸 기록을 돌려줍니다."""
+    station_name, station_info = job
+    with request_log.context(station=station_key(station_info)):
+        return fetch_station(station_name, station_info)
+
+
+def fetch_station(station_name, station_info):
+    line_name = station_info.get('lnNm', station_info['lnCd'])
+
+    # API URL 구성
+    url = f"{API_BASE_URL}?serviceKey={SERVICE_KEY}&format=json"
+    url += f"&railOprIsttCd={station_info['railOprIsttCd']}"
+    url += f"&lnCd={station_info['lnCd']}"
+    url += f"&stinCd={station_info['stinCd']}"
+
+    # API 호출 (실패하면 예외 -> 동시 요청 제어기가 오류로 집계)
+    response = engine.get(url, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+
+    entry = {
+        'key': station_key(station_info),
+        'station_name': station_name,
+        'line_name': line_name,
+        'status': 'none',
+        'rooms': [],
+        'images_downloaded': 0,
+        'failed': []
+    }
+
+    # 수유실 정보가 있는지 확인
+    if not (data and 'body' in data and isinstance(data['body'], list) and len(data['body']) > 0):
+        return entry
+    entry['status'] = 'room'
+
+    # 각 수유실 정보 처리
+    for idx, room in enumerate(data['body']):
+        room_info = {
+            'station_name': station_name,
+            'line_name': line_name,
+            'railOprIsttCd': station_info['railOprIsttCd'],
+            'lnCd': station_info['lnCd'],
+            'stinCd': station_info['stinCd'],
+            'room_data': room
+        }
+        entry['rooms'].append(room_info)
+
+        # 이미지 URL이 있으면 다운로드
+        if not room.get('atchFleUrl'):
+            continue
+        image_url = room['atchFleUrl']
+
+        # 파일명 생성 (역명_노선명_인덱스.jpg)
+        safe_station_name = station_name.replace('/', '_').replace('\\', '_')
+        safe_line_name = line_name.replace('/', '_').replace('\\', '_')
+
+        # 원본 파일 확장자 추출
+        parsed_url = urlparse(image_url)
+        file_ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
+
+        filename = f"{safe_station_name}_{safe_line_name}_{idx+1}{file_ext}"
+        filepath = os.path.join(IMAGES_DIR, filename)
+
+        try:
+            download_room_image(image_url, filepath)
+            entry['images_downloaded'] += 1
+            room_info['image_path'] = filepath
+        except Exception as img_error:
+            entry['failed'].append({
+                'station': station_name,
+                'line': line_name,
+                'error': str(img_error),
+                'url': image_url
+            })
+
+    # 이미지가 하나라도 실패하면 다음 실행에서 다시 조회
+    if entry['failed']:
+        entry['status'] = 'error'
+    return entry
+
+
+# 체크포인트 불러오기 (오류로 끝난 역은 다시 조회)
+if args.restart and os.path.exists(args.checkpoint):
+    os.remove(args.checkpoint)
+    print(f"🗑️ '{args.checkpoint}'을 지우고 처음부터 조회합니다.")
+entries = load_checkpoint(args.checkpoint)
+
+jobs = []
+skipped = 0
+for station_name, station_info_list in stations_data.items():
+    for station_info in station_info_list:
+        entry = entries.get(station_key(station_info))
+        if entry is not None and entry['status'] != 'error':
+            skipped += 1
+            continue
+        jobs.append((station_name, station_info))
+
+print(f"🚀 {len(jobs)}개 역(노선) 조회 시작 (체크포인트에서 건너뜀 {skipped}개, "
+      f"동시 {controller.min_limit}~{controller.max_limit}개, 초당 {args.rate}회)\n")
+
+journal = open_checkpoint(args.checkpoint)
+completed = 0
+try:
+    for job, entry, error in engine.map(crawl_station, jobs, controller):
+        station_name, station_info = job
+        line_name = station_info.get('lnNm', station_info['lnCd'])
+        completed += 1
+        if error is not None:
+            entry = {
+                'key': station_key(station_info),
+                'station_name': station_name,
+                'line_name': line_name,
+                'status': 'error',
+                'rooms': [],
+                'images_downloaded': 0,
+                'failed': [{'station': station_name, 'line': line_name, 'error': str(error),
+                            'url': f"{API_BASE_URL}?railOprIsttCd={station_info['railOprIsttCd']}"
+                                   f"&lnCd={station_info['lnCd']}&stinCd={station_info['stinCd']}"}]
+            }
+            print(f"[{completed}/{len(jobs)}] ❌ {station_name} ({line_name}) 오류: {error}")
+        elif entry['status'] == 'none':
+            print(f"[{completed}/{len(jobs)}] ℹ️ {station_name} ({line_name}) 수유실 없음")
+        else:
+            print(f"[{completed}/{len(jobs)}] ✅ {station_name} ({line_name}) 수유실 {len(entry['rooms'])}개, "
+                  f"이미지 {entry['images_downloaded']}개 (실패 {len(entry['failed'])}개)")
+
+        # 한 역이 끝날 때마다 바로 기록 (중간에 멈춰도 여기까지는 다시 하지 않음)
+        entries[entry['key']] = entry
+        journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        journal.flush()
+except KeyboardInterrupt:
+    print(f"\n⏸️ 중단했습니다. 다시 실행하면 '{args.checkpoint}'에 기록된 역은 건너뜁니다.")
+finally:
+    journal.close()
+
+# 체크포인트 전체(이전 실행 포함)로 결과 만들기 - stations.json 순서
 results = {
     'total_stations': 0,
     'stations_with_nursing_room': 0,
@@ -29,113 +221,38 @@ results = {
     'failed': [],
     'nursing_rooms': []
 }
-
-# 각 역에 대해 API 호출
 for station_name, station_info_list in stations_data.items():
     for station_info in station_info_list:
+        entry = entries.get(station_key(station_info))
+        if entry is None:
+            continue
         results['total_stations'] += 1
-        
-        # API URL 구성
-        url = f"{API_BASE_URL}?serviceKey={SERVICE_KEY}&format=json"
-        url += f"&railOprIsttCd={station_info['railOprIsttCd']}"
-        url += f"&lnCd={station_info['lnCd']}"
-        url += f"&stinCd={station_info['stinCd']}"
-        
-        line_name = station_info.get('lnNm', station_info['lnCd'])
-        print(f"🔍 조회 중: {station_name} ({line_name})... ", end='')
-        
-        try:
-            # API 호출
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 수유실 정보가 있는지 확인
-            if data and 'body' in data and isinstance(data['body'], list) and len(data['body']) > 0:
-                results['stations_with_nursing_room'] += 1
-                print(f"✅ 수유실 발견!")
-                
-                # 각 수유실 정보 처리
-                for idx, room in enumerate(data['body']):
-                    room_info = {
-                        'station_name': station_name,
-                        'line_name': line_name,
-                        'railOprIsttCd': station_info['railOprIsttCd'],
-                        'lnCd': station_info['lnCd'],
-                        'stinCd': station_info['stinCd'],
-                        'room_data': room
-                    }
-                    results['nursing_rooms'].append(room_info)
-                    
-                    # 이미지 URL이 있으면 다운로드
-                    if 'atchFleUrl' in room and room['atchFleUrl']:
-                        image_url = room['atchFleUrl']
-                        
-                        # 파일명 생성 (역명_노선명_인덱스.jpg)
-                        safe_station_name = station_name.replace('/', '_').replace('\\', '_')
-                        safe_line_name = line_name.replace('/', '_').replace('\\', '_')
-                        
-                        # 원본 파일 확장자 추출
-                        parsed_url = urlparse(image_url)
-                        file_ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
-                        
-                        filename = f"{safe_station_name}_{safe_line_name}_{idx+1}{file_ext}"
-                        filepath = os.path.join(IMAGES_DIR, filename)
-                        
-                        print(f"   📥 이미지 다운로드 중: {filename}... ", end='')
-                        
-                        try:
-                            img_response = requests.get(image_url, timeout=10)
-                            img_response.raise_for_status()
-                            
-                            with open(filepath, 'wb') as img_file:
-                                img_file.write(img_response.content)
-                            
-                            results['images_downloaded'] += 1
-                            room_info['image_path'] = filepath
-                            print("✅ 완료")
-                            
-                        except Exception as img_error:
-                            print(f"❌ 실패: {img_error}")
-                            results['failed'].append({
-                                'station': station_name,
-                                'line': line_name,
-                                'error': str(img_error),
-                                'url': image_url
-                            })
-                    else:
-                        print(f"   ℹ️ 이미지 URL이 없습니다.")
-            else:
-                print("ℹ️ 수유실 없음")
-                
-        except Exception as e:
-            print(f"❌ 오류: {e}")
-            results['failed'].append({
-                'station': station_name,
-                'line': line_name,
-                'error': str(e),
-                'url': url
-            })
-        
-        # API 호출 간 딜레이 (서버 부하 방지)
-        time.sleep(0.5)
+        if entry['rooms']:
+            results['stations_with_nursing_room'] += 1
+        results['images_downloaded'] += entry['images_downloaded']
+        results['failed'].extend(entry['failed'])
+        results['nursing_rooms'].extend(entry['rooms'])
 
 # 결과 요약
 print("\n" + "="*60)
 print("📊 다운로드 결과 요약")
 print("="*60)
-print(f"총 조회한 역(노선): {results['total_stations']}개")
+print(f"총 조회한 역(노선): {results['total_stations']}개 (이번 실행 {completed}개)")
 print(f"수유실이 있는 역: {results['stations_with_nursing_room']}개")
 print(f"다운로드한 이미지: {results['images_downloaded']}개")
 print(f"실패한 요청: {len(results['failed'])}개")
+print(controller.summary())
+if engine.cache is not None:
+    print(engine.cache.summary())
+if engine.log is not None:
+    print(engine.log.summary())
 print("="*60)
 
 # 결과를 JSON 파일로 저장
-result_file = 'nursing_room_results.json'
-with open(result_file, 'w', encoding='utf-8') as f:
+with open(RESULT_FILE, 'w', encoding='utf-8') as f:
     json.dump(results, f, ensure_ascii=False, indent=4)
 
-print(f"\n✅ 상세 결과가 '{result_file}' 파일에 저장되었습니다.")
+print(f"\n✅ 상세 결과가 '{RESULT_FILE}' 파일에 저장되었습니다.")
 print(f"✅ 이미지는 '{IMAGES_DIR}' 폴더에 저장되었습니다.")
 
 # 실패한 요청이 있으면 표시
@@ -145,3 +262,4 @@ if results['failed']:
         print(f"   - {fail['station']} ({fail['line']}): {fail['error']}")
     if len(results['failed']) > 10:
         print(f"   ... 외 {len(results['failed']) - 10}개")
+    print(f"   (다시 실행하면 실패한 역만 다시 조회합니다)")
@@ -2,14 +2,19 @@
 """
 KRIC 웹사이트에서 역 편의시설 이미지를 다운로드하는 스크립트
 이미지 URL 패턴: https://hc.kric.go.kr/hc/ext/images/visual/handicapped/cnv/{railOprIsttCd}/{railOprIsttCd}_{lnCd}_{prprStinCd}.png
+노선 매핑 조회와 이미지 다운로드는 kric_fetch.py 엔진으로 병렬 처리 (--workers / --rate)
+추측한 주소는 HEAD/Range 로 먼저 있는지 확인하고 있는 것만 받음 (image_probe.py, --no-probe 로 끄기)
 """
 
-import requests
+import argparse
 import json
 import os
-import time
 import sys
 
+import image_probe
+import station_index
+from kric_fetch import FetchEngine, add_arguments
+
 # Windows 콘솔 인코딩 설정
 if sys.platform == 'win32':
     import codecs
@@ -22,24 +27,24 @@ LEGEND_API = '/hc/visual/handicapped/selectLegendClickInfo.do'
 IMAGE_BASE = '/hc/ext/images/visual/handicapped/cnv'
 IMAGES_DIR = 'station_images'
 
+parser = add_arguments(argparse.ArgumentParser(description='stations.json 기준 역 이미지 다운로드'))
+image_probe.add_arguments(parser)
+args = parser.parse_args()
+
 # 이미지 저장 폴더 생성
 if not os.path.exists(IMAGES_DIR):
     os.makedirs(IMAGES_DIR)
     print(f"[생성] '{IMAGES_DIR}' 폴더를 생성했습니다.")
 
-# stations.json 파일 로드
+# stations.json 파일 로드 (station_index.py)
 print("[로드] 역 정보를 불러오는 중...")
-with open('stations.json', 'r', encoding='utf-8') as f:
-    stations_data = json.load(f)
+index = station_index.load()
+stations_data = index.stations
 
 print(f"[완료] 총 {len(stations_data)}개의 역 정보를 로드했습니다.\n")
 
-# 세션 생성
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Referer': 'https://hc.kric.go.kr/hc/index.jsp'
-})
+# 요청 엔진 생성 (동시 요청 수 + 호스트별 속도 제한)
+engine = FetchEngine.from_args(args)
 
 # 지역 코드 매핑 (필요시 확장)
 AREA_CODE_MAP = {
@@ -52,13 +57,20 @@ AREA_CODE_MAP = {
     # 필요시 다른 지역 코드 추가
 }
 
+# harvest_station_mapping.py 가 찾은 (운영기관, 노선) -> 지역 코드가 있으면 우선 사용
+LINE_AREAS_FILE = 'station_line_areas.json'
+line_areas = {}
+if os.path.exists(LINE_AREAS_FILE):
+    with open(LINE_AREAS_FILE, 'r', encoding='utf-8') as f:
+        line_areas = json.load(f)
+
 def get_prpr_stin_cd_mapping(area_cd, line_cd):
     """
     selectLegendClickInfo.do API를 호출하여 역명과 prprStinCd 매핑을 가져옵니다.
     """
     try:
         url = f"{BASE_URL}{LEGEND_API}?paramAreCd={area_cd}&paramLnCd={line_cd}"
-        response = session.get(url, timeout=10)
+        response = engine.get(url, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -79,24 +91,11 @@ def get_prpr_stin_cd_mapping(area_cd, line_cd):
     return {}
 
 def download_image(image_url, save_path):
-    """이미지를 다운로드합니다."""
+    """이미지를 임시 파일로 스트리밍 다운로드한 뒤 제자리로 교체합니다."""
     try:
-        response = session.get(image_url, timeout=10)
-        
-        # 404나 다른 에러는 건너뜀
-        if response.status_code != 200:
-            return False
-            
-        # 파일 크기가 너무 작으면 스킵
-        if len(response.content) < 500:
-            return False
-            
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        
-        return True
-        
-    except Exception as e:
+        # 404나 다른 에러, 500바이트 미만(에러 이미지)은 건너뜀
+        return engine.download(image_url, save_path, min_bytes=500, timeout=10) is not None
+    except Exception:
         return False
 
 # 결과 저장
@@ -113,80 +112,114 @@ results = {
 # 노선별로 prprStinCd 매핑 캐시
 line_mappings = {}
 
-# 각 역에 대해 처리
-station_count = 0
+# 1단계: 각 역(호선)의 작업 목록과 필요한 노선 매핑 수집
+jobs = []
+line_queries = {}
 for station_name, station_info_list in stations_data.items():
     for station_info in station_info_list:
-        station_count += 1
         results['total_stations'] += 1
-        
+
         rail_code = station_info['railOprIsttCd']
         line_code = station_info['lnCd']
-        station_code = station_info['stinCd']
-        line_name = station_info.get('lnNm', line_code)
-        
-        # 진행률 표시 (10개마다)
-        if station_count % 10 == 0:
-            print(f"[진행] {station_count}/{len(stations_data)} 처리 중...")
-        
+
         # 지역 코드 가져오기
-        area_code = AREA_CODE_MAP.get(rail_code, '01')
-        
-        # 노선별 매핑 캐시 확인
+        area_code = line_areas.get(f"{rail_code}_{line_code}") or AREA_CODE_MAP.get(rail_code, '01')
         cache_key = f"{area_code}_{line_code}"
-        
-        if cache_key not in line_mappings:
-            print(f"\n[API] {line_name} 노선의 역 코드 매핑 조회 중...")
-            results['mapping_attempts'] += 1
-            
-            mapping = get_prpr_stin_cd_mapping(area_code, line_code)
-            
-            if mapping:
-                line_mappings[cache_key] = mapping
-                results['mappings_found'] += 1
-                print(f"   [OK] {len(mapping)}개 역 매핑 완료")
-            else:
-                line_mappings[cache_key] = {}
-                print(f"   [FAIL] 매핑 실패")
-            
-            time.sleep(0.5)  # API 호출 간 딜레이
-        
-        # prprStinCd 찾기
-        prpr_stin_cd = line_mappings.get(cache_key, {}).get(station_name)
-        
-        if not prpr_stin_cd:
-            # 매핑을 찾지 못한 경우 원본 코드로 시도
-            prpr_stin_cd = station_code
-        
-        # 이미지 URL 생성
-        image_url = f"{BASE_URL}{IMAGE_BASE}/{rail_code}/{rail_code}_{line_code}_{prpr_stin_cd}.png"
-        
-        # 파일명 생성
-        safe_station_name = station_name.replace('/', '_').replace('\\', '_')
-        safe_line_name = line_name.replace('/', '_').replace('\\', '_')
-        filename = f"{safe_station_name}_{safe_line_name}.png"
-        filepath = os.path.join(IMAGES_DIR, filename)
-        
-        # 이미지 다운로드 시도
-        if download_image(image_url, filepath):
-            results['images_downloaded'] += 1
-            results['images_found'] += 1
-            
-            if station_name not in results['station_images']:
-                results['station_images'][station_name] = []
-            
-            results['station_images'][station_name].append({
-                'line_name': line_name,
-                'filename': filename,
-                'url': image_url,
-                'rail_code': rail_code,
-                'line_code': line_code,
-                'prpr_stin_cd': prpr_stin_cd
-            })
-            
-            # 간헐적으로 성공 메시지 출력
-            if results['images_downloaded'] % 50 == 0:
-                print(f"   [+] {results['images_downloaded']}개 이미지 다운로드 완료")
+        line_queries.setdefault(cache_key, (area_code, line_code, station_info.get('lnNm', line_code)))
+
+        jobs.append({
+            'station_name': station_name,
+            'rail_code': rail_code,
+            'line_code': line_code,
+            'station_code': station_info['stinCd'],
+            'line_name': station_info.get('lnNm', line_code),
+            'cache_key': cache_key
+        })
+
+# 2단계: 노선별 매핑을 병렬 조회
+print(f"[API] {len(line_queries)}개 노선의 역 코드 매핑 조회 중...")
+
+
+def fetch_line_mapping(cache_key):
+    area_code, line_code, _ = line_queries[cache_key]
+    return get_prpr_stin_cd_mapping(area_code, line_code)
+
+
+for cache_key, mapping, error in engine.map(fetch_line_mapping, line_queries):
+    results['mapping_attempts'] += 1
+    line_name = line_queries[cache_key][2]
+    if mapping:
+        line_mappings[cache_key] = mapping
+        results['mappings_found'] += 1
+        print(f"   [OK] {line_name}: {len(mapping)}개 역 매핑 완료")
+    else:
+        line_mappings[cache_key] = {}
+        print(f"   [FAIL] {line_name}: 매핑 실패")
+
+# 3단계: 이미지 URL 생성
+for job in jobs:
+    # prprStinCd 찾기
+    prpr_stin_cd = line_mappings.get(job['cache_key'], {}).get(job['station_name'])
+
+    if not prpr_stin_cd:
+        # API 매핑이 없으면 매핑 파일의 대응표, 그래도 없으면 원본 코드로 시도
+        prpr_stin_cd = (index.prpr_for(job['rail_code'], job['line_code'], job['station_code'])
+                        or job['station_code'])
+    job['prpr_stin_cd'] = prpr_stin_cd
+
+    rail_code = job['rail_code']
+    job['url'] = f"{BASE_URL}{IMAGE_BASE}/{rail_code}/{station_index.image_filename(rail_code, job['line_code'], prpr_stin_cd)}"
+
+    # 파일명 생성
+    safe_station_name = job['station_name'].replace('/', '_').replace('\\', '_')
+    safe_line_name = job['line_name'].replace('/', '_').replace('\\', '_')
+    job['filename'] = f"{safe_station_name}_{safe_line_name}.png"
+
+# 4단계: 이미지가 있는 주소만 골라 병렬 다운로드 (매핑이 없어 추측한 주소는 대부분 404)
+download_jobs = jobs
+if not args.no_probe:
+    probe = image_probe.ImageProbe(refresh=args.refresh_probe)
+    print(f"\n[프로브] {len(jobs)}개 이미지 주소 확인 중 (HEAD / Range)...")
+    existence = probe.probe_all(engine, [job['url'] for job in jobs])
+    print(probe.summary(existence))
+    download_jobs = [job for job in jobs if existence[job['url']]]
+
+print(f"\n[다운로드] {len(download_jobs)}개 이미지 다운로드 시도 중...")
+
+
+def fetch_image(job):
+    return download_image(job['url'], os.path.join(IMAGES_DIR, job['filename']))
+
+
+for job in jobs:
+    job['downloaded'] = False
+
+for job, ok, error in engine.map(fetch_image, download_jobs):
+    job['downloaded'] = bool(ok)
+    if ok:
+        results['images_downloaded'] += 1
+        results['images_found'] += 1
+
+        # 간헐적으로 성공 메시지 출력
+        if results['images_downloaded'] % 50 == 0:
+            print(f"   [+] {results['images_downloaded']}개 이미지 다운로드 완료")
+
+# 역별 결과는 stations.json 순서대로 정리
+for job in jobs:
+    if not job['downloaded']:
+        continue
+    station_name = job['station_name']
+    if station_name not in results['station_images']:
+        results['station_images'][station_name] = []
+
+    results['station_images'][station_name].append({
+        'line_name': job['line_name'],
+        'filename': job['filename'],
+        'url': job['url'],
+        'rail_code': job['rail_code'],
+        'line_code': job['line_code'],
+        'prpr_stin_cd': job['prpr_stin_cd']
+    })
 
 # 최종 결과
 print("\n" + "="*60)
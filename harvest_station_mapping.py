@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+전국 역 코드 매핑(prprStinCd) 수집기
+API: https://hc.kric.go.kr/hc/visual/handicapped/selectLegendClickInfo.do?paramAreCd={지역}&paramLnCd={노선}
+- 지역(AREA_CODES) x 노선(stations.json 의 모든 lnCd + 기본 1~9) 조합을 모두 조회해 응답이 있는 조합을 찾음
+- kric_fetch.py 엔진으로 동시에 조회 (--workers / --rate)
+- 조합별 응답을 .cache/legend/{지역}_{노선}.json 에 저장하고, TTL이 지난 조합만 다시 조회
+- 결과를 station_prpr_mapping.json 에 합치고(기존 항목 유지, 새 역 추가/바뀐 코드 갱신),
+  (운영기관, 노선) -> 지역 코드를 station_line_areas.json 에 기록 (download_station_images.py 에서 사용)
+
+사용법:
+    python harvest_station_mapping.py                  # 전국
+    python harvest_station_mapping.py --areas 01 02    # 수도권, 부산만
+    python harvest_station_mapping.py --refresh        # 캐시 무시하고 모두 다시 조회
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import station_index
+from kric_fetch import FetchEngine, add_arguments
+from station_index import mapping_key
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+BASE_URL = 'https://hc.kric.go.kr'
+LEGEND_API = '/hc/visual/handicapped/selectLegendClickInfo.do'
+CACHE_DIR = os.path.join('.cache', 'legend')
+LINE_AREAS_FILE = 'station_line_areas.json'
+
+AREA_CODES = {
+    '01': '수도권',
+    '02': '부산',
+    '03': '대구',
+    '04': '광주',
+    '05': '대전'
+}
+DEFAULT_LINES = [str(n) for n in range(1, 10)]
+
+CACHE_TTL = 7 * 24 * 60 * 60          # 역이 있는 조합
+EMPTY_CACHE_TTL = 30 * 24 * 60 * 60   # 역이 없는 조합 (다시 확인하는 간격)
+
+
+def candidate_lines(index):
+    """조회할 노선 코드: 기본 1~9 + stations.json 에 나오는 모든 lnCd"""
+    lines = list(DEFAULT_LINES)
+    for info_list in index.stations.values():
+        for info in info_list:
+            if info['lnCd'] not in lines:
+                lines.append(info['lnCd'])
+    return lines
+
+
+def cache_path(area, line):
+    return os.path.join(CACHE_DIR, f"{area}_{line}.json")
+
+
+def read_cache(area, line, now=None):
+    """만료되지 않은 캐시의 역 목록, 없거나 만료됐으면 None"""
+    path = cache_path(area, line)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        cached = json.load(f)
+    ttl = CACHE_TTL if cached['stations'] else EMPTY_CACHE_TTL
+    if (now or time.time()) - cached['fetched_at'] > ttl:
+        return None
+    return cached['stations']
+
+
+def write_cache(area, line, stations):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = cache_path(area, line)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'fetched_at': time.time(), 'stations': stations}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def fetch_legend(engine, area, line):
+    url = f"{BASE_URL}{LEGEND_API}?paramAreCd={area}&paramLnCd={line}"
+    response = engine.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json().get('resultStinList') or []
+
+
+def merge_mapping(mapping, stations):
+    """응답의 역들을 매핑에 합칩니다. (추가 수, 갱신 수)"""
+    added = updated = 0
+    for station in stations:
+        rail = station.get('railOprIsttCd')
+        ln = station.get('lnCd')
+        name = station.get('stinNm')
+        prpr = station.get('prprStinCd')
+        if not all([rail, ln, name, prpr]):
+            continue
+        key = mapping_key(rail, ln, name)
+        entry = {'railOprIsttCd': rail, 'lnCd': ln, 'stinNm': name, 'prprStinCd': prpr}
+        if key not in mapping:
+            added += 1
+        elif mapping[key] != entry:
+            updated += 1
+        else:
+            continue
+        mapping[key] = entry
+    return added, updated
+
+
+def main():
+    parser = add_arguments(argparse.ArgumentParser(description='전국 역 코드 매핑(prprStinCd) 수집'))
+    parser.add_argument('--areas', nargs='+', default=list(AREA_CODES), help='지역 코드 (기본: 전체)')
+    parser.add_argument('--lines', nargs='+', help='노선 코드 (기본: 1~9 + stations.json 의 모든 lnCd)')
+    parser.add_argument('--refresh', action='store_true', help='캐시를 무시하고 모두 다시 조회')
+    parser.add_argument('-o', '--output', default=station_index.MAPPING_FILE)
+    args = parser.parse_args()
+
+    index = station_index.load()
+    lines = args.lines or candidate_lines(index)
+    combos = [(area, line) for area in args.areas for line in lines]
+
+    responses = {}
+    stale = []
+    for combo in combos:
+        cached = None if args.refresh else read_cache(*combo)
+        if cached is None:
+            stale.append(combo)
+        else:
+            responses[combo] = cached
+    print(f"[시작] 지역 {len(args.areas)}개 x 노선 {len(lines)}개 = {len(combos)}개 조합 "
+          f"(캐시 {len(responses)}개, 조회 {len(stale)}개)\n")
+
+    engine = FetchEngine.from_args(args)
+    failed = []
+    for combo, stations, error in engine.map(lambda c: fetch_legend(engine, *c), stale):
+        area, line = combo
+        if error is not None:
+            failed.append(combo)
+            print(f"   [ERROR] 지역={area}, 노선={line}: {str(error)[:80]}")
+            continue
+        write_cache(area, line, stations)
+        responses[combo] = stations
+        if stations:
+            print(f"   [OK] 지역={area}({AREA_CODES.get(area, '?')}), 노선={line}: {len(stations)}개 역")
+
+    mapping = {}
+    if os.path.exists(args.output):
+        with open(args.output, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+
+    line_areas = {}
+    if os.path.exists(LINE_AREAS_FILE):
+        with open(LINE_AREAS_FILE, 'r', encoding='utf-8') as f:
+            line_areas = json.load(f)
+
+    added = updated = 0
+    found = 0
+    for combo in combos:
+        stations = responses.get(combo)
+        if not stations:
+            continue
+        found += 1
+        a, u = merge_mapping(mapping, stations)
+        added += a
+        updated += u
+        for station in stations:
+            if station.get('railOprIsttCd') and station.get('lnCd'):
+                line_areas[f"{station['railOprIsttCd']}_{station['lnCd']}"] = combo[0]
+
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, args.output)
+    with open(LINE_AREAS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(line_areas.items())), f, ensure_ascii=False, indent=4)
+
+    print("\n" + "="*60)
+    print(f"[완료] 역이 있는 조합 {found}개, 실패 {len(failed)}개")
+    print(f"매핑 {len(mapping)}개 (추가 {added}개, 갱신 {updated}개)")
+    print("="*60)
+    print(f"\n[저장] '{args.output}', '{LINE_AREAS_FILE}'")
+
+
+if __name__ == '__main__':
+    main()
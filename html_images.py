@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+크롤링한 HTML에서 이미지(img) 주소만 빠르게 뽑는 추출기
+전체 페이지를 트리로 만들지 않고 img 태그의 src / data-src / alt / title 만 읽습니다.
+아이콘/로고/버튼/화살표 이미지는 태그를 읽는 즉시 걸러냅니다.
+
+백엔드 (auto = 설치된 것 중 위에서부터)
+    selectolax : C 파서 (pip install selectolax)
+    lxml       : lxml.html (pip install lxml)
+    stdlib     : html.parser 스트리밍 (img 시작 태그만 처리, 추가 설치 없음)
+    regex      : 주석/script/style 을 지운 뒤 img 태그만 정규식으로 찾아 속성을 읽음
+    bs4        : BeautifulSoup + SoupStrainer('img') (기존 방식과 같은 결과 확인용)
+
+사용법:
+    from html_images import extract_images
+    extract_images(html, base_url)                  # [{'url', 'alt', 'title'}, ...]
+    python html_images.py bench                     # 백엔드별 페이지당 처리 시간 비교 (tests/fixtures/sample_page.html)
+    python html_images.py bench sample_page.html    # crawl_nursing_room_images.py 가 저장한 실제 페이지로 비교
+"""
+
+import argparse
+import html
+import os
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+EXCLUDE_WORDS = ('icon', 'logo', 'btn', 'arrow')
+# 벤치마크 기본 페이지 (저장소에 포함된 작은 예제)
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'sample_page.html')
+
+# 주석과 script/style 안의 img 는 실제 이미지가 아니므로 먼저 지움
+SKIP_RE = re.compile(r'<!--.*?(?:-->|$)|<(script|style)\b.*?(?:</\1\s*>|$)', re.IGNORECASE | re.DOTALL)
+# 따옴표 안의 '>' 에서 태그가 끊기지 않게 (alt="a>b")
+IMG_TAG_RE = re.compile(r'''<img\b(?:[^>"']|"[^"]*"|'[^']*')*>''', re.IGNORECASE)
+ATTR_RE = re.compile(r'''([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+
+
+def _image(attrs, base_url):
+    """img 속성 딕셔너리 -> 결과 항목 (제외 대상이면 None)"""
+    src = attrs.get('src') or attrs.get('data-src')
+    if not src:
+        return None
+    full_url = urljoin(base_url, src)
+    lowered = full_url.lower()
+    if any(word in lowered for word in EXCLUDE_WORDS):
+        return None
+    return {'url': full_url, 'alt': attrs.get('alt') or '', 'title': attrs.get('title') or ''}
+
+
+def _collect(attr_dicts, base_url):
+    images = []
+    for attrs in attr_dicts:
+        item = _image(attrs, base_url)
+        if item is not None:
+            images.append(item)
+    return images
+
+
+def extract_regex(html_content, base_url):
+    def attr_dicts():
+        for tag in IMG_TAG_RE.finditer(SKIP_RE.sub('', html_content)):
+            attrs = {}
+            for match in ATTR_RE.finditer(tag.group(0), 4):
+                name = match.group(1).lower()
+                if name not in attrs:
+                    value = next(v for v in match.group(2, 3, 4) if v is not None)
+                    attrs[name] = html.unescape(value)
+            yield attrs
+    return _collect(attr_dicts(), base_url)
+
+
+class _ImgParser(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.images = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            item = _image(dict(attrs), self.base_url)
+            if item is not None:
+                self.images.append(item)
+
+    handle_startendtag = handle_starttag
+
+
+def extract_stdlib(html_content, base_url):
+    parser = _ImgParser(base_url)
+    parser.feed(html_content)
+    parser.close()
+    return parser.images
+
+
+def extract_lxml(html_content, base_url):
+    import lxml.html
+    root = lxml.html.fromstring(html_content)
+    return _collect((dict(img.attrib) for img in root.iter('img')), base_url)
+
+
+def extract_selectolax(html_content, base_url):
+    from selectolax.parser import HTMLParser as FastParser
+    tree = FastParser(html_content)
+    return _collect((node.attributes for node in tree.css('img')), base_url)
+
+
+def extract_bs4(html_content, base_url):
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=SoupStrainer('img'))
+    return _collect((img.attrs for img in soup.find_all('img')), base_url)
+
+
+BACKENDS = {
+    'selectolax': (extract_selectolax, 'selectolax.parser'),
+    'lxml': (extract_lxml, 'lxml.html'),
+    'stdlib': (extract_stdlib, None),
+    'regex': (extract_regex, None),
+    'bs4': (extract_bs4, 'bs4'),
+}
+AUTO_ORDER = ['selectolax', 'lxml', 'stdlib', 'regex']
+
+
+def available_backends():
+    names = []
+    for name, (_, module) in BACKENDS.items():
+        if module is None:
+            names.append(name)
+            continue
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+def resolve_backend(name='auto'):
+    """'auto' 면 설치된 것 중 가장 빠른 백엔드 이름"""
+    if name in (None, 'auto'):
+        installed = available_backends()
+        return next(n for n in AUTO_ORDER if n in installed)
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 백엔드: {name} ({', '.join(BACKENDS)})")
+    return name
+
+
+def extract_images(html_content, base_url, backend='auto'):
+    """img 태그의 이미지 주소 목록 [{'url', 'alt', 'title'}] (아이콘/로고/버튼/화살표 제외)"""
+    return BACKENDS[resolve_backend(backend)][0](html_content, base_url)
+
+
+def bench(paths, repeat, base_url):
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    size = sum(len(page) for page in pages)
+    print(f"[벤치] 페이지 {len(pages)}개 ({size / 1024:.1f} KB), {repeat}회 반복")
+
+    reference = None
+    baseline = None
+    for name in available_backends():
+        func = BACKENDS[name][0]
+        found = [func(page, base_url) for page in pages]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                func(page, base_url)
+        per_page = (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+        if reference is None:
+            reference = found
+        same = '같음' if found == reference else '다름'
+        baseline = baseline or per_page
+        print(f"   {name:<11} {per_page:8.3f} ms/페이지  이미지 {sum(map(len, found)):>4}개  "
+              f"(첫 백엔드와 결과 {same}, {baseline / per_page:5.1f}x)")
+    print(f"[auto] {resolve_backend()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 이미지 추출기')
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench_parser = sub.add_parser('bench', help='백엔드별 처리 시간 비교')
+    bench_parser.add_argument('pages', nargs='*', default=[SAMPLE_PAGE],
+                              help=f'저장한 HTML 파일 (기본 {SAMPLE_PAGE}, '
+                                   f'crawl_nursing_room_images.py 를 실행하면 sample_page.html 이 저장됨)')
+    bench_parser.add_argument('--repeat', type=int, default=50)
+    bench_parser.add_argument('--base-url', default='https://hc.kric.go.kr')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        bench(args.pages, args.repeat, args.base_url)
+
+
+if __name__ == '__main__':
+    main()
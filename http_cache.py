@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+KRIC 스크레이퍼 공용 디스크 HTTP 캐시
+- GET 응답(상태 코드, 헤더, 본문)을 요청 주소 해시로 .cache/http/ 에 저장
+- 주소별 TTL(TTL_RULES), 전체 크기 상한(max_bytes)을 넘으면 가장 오래 안 쓴 응답부터 삭제 (LRU)
+- 모드
+    off    : 캐시 사용 안 함 (기본)
+    on     : 신선한 캐시가 있으면 네트워크 없이 응답, 없으면 받아서 저장
+    replay : 캐시에서만 응답 (기간이 지나도 사용), 없으면 CacheMiss - 네트워크 호출 0회
+파싱 로직을 고치면서 같은 페이지를 다시 크롤링하지 않고, 저장된 응답을 고정 입력(fixture)으로 쓸 수 있습니다.
+
+사용법:
+    KRIC_HTTP_CACHE=on python crawl_nursing_room_images.py
+    python download_mapping_images.py --http-cache replay
+    python http_cache.py stats | clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+CACHE_DIR = os.path.join('.cache', 'http')
+MAX_BYTES = 500 * 1024 * 1024
+MODES = ('off', 'on', 'replay')
+CACHEABLE_STATUS = (200, 404, 410)
+
+DAY = 24 * 60 * 60
+# (주소 정규식, TTL 초) - 처음 일치하는 규칙 사용, 0이면 저장하지 않음
+TTL_RULES = [
+    (r'/selectLegendClickInfo\.do', 7 * DAY),          # 역 코드 매핑
+    (r'/images/visual/handicapped/cnv/', 30 * DAY),    # 편의시설 안내도 이미지
+    (r'openapi\.kric\.go\.kr/openapi/', 1 * DAY),      # KRIC Open API
+    (r'\.(?:png|jpe?g|gif|webp)(?:\?|$)', 30 * DAY),   # 그 밖의 이미지
+    (r'hc\.kric\.go\.kr/', 1 * DAY),                   # 웹 페이지
+]
+DEFAULT_TTL = 1 * DAY
+
+# 저장하는 주소에서 가리는 쿼리 파라미터 (캐시 파일에 키가 남지 않게)
+SECRET_PARAMS_RE = re.compile(r'((?:serviceKey|apiKey|key)=)[^&]*', re.IGNORECASE)
+# 이 헤더가 있는 요청(조건부 요청)은 on 모드에서 캐시를 거치지 않음
+BYPASS_HEADERS = ('If-None-Match', 'If-Modified-Since', 'Range')
+
+
+class CacheMiss(Exception):
+    """replay 모드에서 캐시에 없는 요청"""
+
+
+def ttl_for(url):
+    for pattern, ttl in TTL_RULES:
+        if re.search(pattern, url):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(url):
+    return hashlib.sha256(('GET ' + url).encode('utf-8')).hexdigest()
+
+
+def build_response(url, status, headers, body):
+    """저장된 내용으로 requests.Response 를 만듭니다 (stream=True 로 받은 것처럼 iter_content 가능)."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.headers['Content-Length'] = str(len(body))
+    response._content = body
+    response._content_consumed = True
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.reason = 'OK' if status == 200 else ''
+    response.from_cache = True
+    return response
+
+
+class HttpCache:
+    """
+    주소 -> 응답 디스크 캐시. 항목은 {해시 앞 2자리}/{해시}.json(메타) + .body(본문) 두 파일.
+    사용 순서(LRU)는 메타 파일의 수정 시각으로 기록해 다음 실행에도 이어집니다.
+    """
+
+    def __init__(self, mode='on', cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        if mode not in MODES:
+            raise ValueError(f"캐시 모드는 {', '.join(MODES)} 중 하나여야 합니다: {mode}")
+        self.mode = mode
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._lru = None   # 키 -> 크기 (오래 안 쓴 것부터)
+        self._total = 0
+
+    # ----- 파일 -----
+    def _paths(self, key):
+        folder = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(folder, key + '.json'), os.path.join(folder, key + '.body')
+
+    def _load_lru(self):
+        """처음 한 번 폴더를 훑어 사용 순서와 전체 크기를 만듭니다."""
+        if self._lru is not None:
+            return
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    meta_path = os.path.join(root, name)
+                    body_path = meta_path[:-5] + '.body'
+                    size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+                    entries.append((os.path.getmtime(meta_path), name[:-5], size))
+        entries.sort()
+        self._lru = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(self._lru.values())
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+        self._total -= self._lru.pop(key, 0)
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._lru) > 1:
+            key = next(iter(self._lru))
+            self._remove(key)
+            self.evictions += 1
+
+    def lookup(self, url):
+        """(메타, 본문) 또는 None. 사용 시각을 갱신합니다."""
+        key = cache_key(url)
+        meta_path, body_path = self._paths(key)
+        with self.lock:
+            self._load_lru()
+            if key not in self._lru or not os.path.exists(body_path):
+                return None
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            self._lru.move_to_end(key)
+            os.utime(meta_path)
+        return meta, body
+
+    def _meta(self, url, response, ttl):
+        return {
+            'url': SECRET_PARAMS_RE.sub(r'\1***', url),
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() not in ('content-encoding', 'transfer-encoding', 'connection', 'set-cookie')},
+            'stored_at': time.time(),
+            'ttl': ttl
+        }
+
+    def _cacheable(self, url, response):
+        """저장할 응답이면 TTL, 아니면 None"""
+        ttl = ttl_for(url)
+        if ttl <= 0 or response.status_code not in CACHEABLE_STATUS:
+            return None
+        return ttl
+
+    def _commit(self, key, meta, body_tmp_path, size):
+        """다 쓴 본문 임시 파일을 제자리로 옮기고 메타를 씁니다 (본문 먼저, 메타가 있으면 완전한 항목)."""
+        meta_path, body_path = self._paths(key)
+        with self.lock:
+            self._load_lru()
+            os.replace(body_tmp_path, body_path)
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(meta, ensure_ascii=False))
+            os.replace(tmp_path, meta_path)
+            self._total -= self._lru.pop(key, 0)
+            self._lru[key] = size
+            self._total += size
+            self.stores += 1
+            self._evict()
+
+    def _body_tmp(self, key):
+        folder = os.path.dirname(self._paths(key)[1])
+        os.makedirs(folder, exist_ok=True)
+        return tempfile.mkstemp(dir=folder, prefix='.', suffix='.part')
+
+    def store(self, url, response):
+        """본문을 이미 받은 응답(stream=False)을 저장합니다."""
+        ttl = self._cacheable(url, response)
+        if ttl is None:
+            return
+        key = cache_key(url)
+        body = response.content
+        fd, tmp_path = self._body_tmp(key)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            self._commit(key, self._meta(url, response, ttl), tmp_path, len(body))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store_streaming(self, url, response):
+        """
+        stream=True 응답: 받는 쪽이 iter_content 로 읽는 만큼 본문을 임시 파일에 같이 쓰고,
+        끝까지 읽었을 때만 저장합니다 (본문 전체를 메모리에 올리지 않음).
+        중간에 그만 읽거나 캐시 상한(max_bytes)보다 크면 저장하지 않습니다.
+        """
+        ttl = self._cacheable(url, response)
+        if ttl is None:
+            return
+        key = cache_key(url)
+        meta = self._meta(url, response, ttl)
+        iter_content = response.iter_content
+
+        def tee(chunk_size=1, decode_unicode=False):
+            if decode_unicode:
+                yield from iter_content(chunk_size, decode_unicode)
+                return
+            fd, tmp_path = self._body_tmp(key)
+            f = os.fdopen(fd, 'wb')
+            size = 0
+            try:
+                for chunk in iter_content(chunk_size):
+                    if f is not None:
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            f.close()
+                            f = None
+                        else:
+                            f.write(chunk)
+                    yield chunk
+                if f is not None:
+                    f.close()
+                    f = None
+                    self._commit(key, meta, tmp_path, size)
+            finally:
+                if f is not None:
+                    f.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        response.iter_content = tee
+
+    # ----- 요청 -----
+    def get(self, session, url, acquire=None, **kwargs):
+        """
+        session.get(url, **kwargs) 대신 사용합니다. session 이 None 이면 requests.get.
+        acquire 는 실제로 네트워크 요청을 보낼 때만 먼저 부르는 함수 (속도 제한용).
+        stream=True 로 받은 미스 응답은 읽는 대로 디스크에 저장합니다 (store_streaming).
+        """
+        getter = session.get if session is not None else requests.get
+        if self.mode == 'off':
+            if acquire:
+                acquire()
+            return getter(url, **kwargs)
+
+        headers = kwargs.get('headers') or {}
+        bypass = self.mode == 'on' and any(h in headers for h in BYPASS_HEADERS)
+        if not bypass:
+            cached = self.lookup(url)
+            if cached is not None:
+                meta, body = cached
+                fresh = time.time() - meta['stored_at'] < meta.get('ttl', ttl_for(url))
+                if fresh or self.mode == 'replay':
+                    with self.lock:
+                        self.hits += 1
+                    return build_response(url, meta['status'], meta['headers'], body)
+            if self.mode == 'replay':
+                with self.lock:
+                    self.misses += 1
+                raise CacheMiss("캐시에 없는 요청 (replay 모드): " + SECRET_PARAMS_RE.sub(r'\1***', url))
+
+        with self.lock:
+            self.misses += 1
+        if acquire:
+            acquire()
+        response = getter(url, **kwargs)
+        if not bypass:
+            if kwargs.get('stream'):
+                self.store_streaming(url, response)
+            else:
+                self.store(url, response)
+        return response
+
+    def summary(self):
+        return f"HTTP 캐시({self.mode}): 적중 {self.hits}, 미스 {self.misses}, 저장 {self.stores}, 삭제 {self.evictions}"
+
+
+def from_env():
+    """환경변수 KRIC_HTTP_CACHE(off/on/replay), KRIC_HTTP_CACHE_DIR, KRIC_HTTP_CACHE_MB 로 캐시를 만듭니다."""
+    mode = os.environ.get('KRIC_HTTP_CACHE', 'off').strip().lower() or 'off'
+    cache_dir = os.environ.get('KRIC_HTTP_CACHE_DIR', CACHE_DIR)
+    max_mb = os.environ.get('KRIC_HTTP_CACHE_MB')
+    return HttpCache(mode, cache_dir, int(max_mb) * 1024 * 1024 if max_mb else MAX_BYTES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KRIC HTTP 캐시 관리')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    cache = HttpCache('on', args.dir)
+    cache._load_lru()
+    if args.command == 'stats':
+        print(f"[캐시] '{args.dir}': {len(cache._lru)}개, {cache._total / 1e6:.1f} MB (상한 {cache.max_bytes / 1e6:.0f} MB)")
+    else:
+        count = len(cache._lru)
+        for key in list(cache._lru):
+            cache._remove(key)
+        print(f"[삭제] {count}개 응답을 지웠습니다.")
+
+
+if __name__ == '__main__':
+    main()
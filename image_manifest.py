@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+이미지 증분 동기화용 매니페스트
+- 이미지별 ETag, Last-Modified, 크기, sha256 해시를 image_manifest.json에 기록
+- 다음 실행 때 조건부 요청(If-None-Match / If-Modified-Since)을 보내고 바뀐 파일만 저장
+download_mapping_images.py --sync 에서 사용
+"""
+
+import json
+import os
+import threading
+import time
+
+from kric_fetch import stream_to_file
+
+MANIFEST_FILE = 'image_manifest.json'
+# (연결, 읽기) 초 - 서버가 죽었으면 연결 단계에서 빨리 실패 (download_mapping_images.py 도 사용)
+TIMEOUT = (5, 15)
+
+# sync() 결과 상태
+UNCHANGED = 'unchanged'
+UPDATED = 'updated'
+NEW = 'new'
+GONE = 'gone'
+FAILED = 'failed'
+
+
+class ImageManifest:
+    """키(매핑 키) -> {url, filename, etag, last_modified, size, sha256, checked_at}"""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def conditional_headers(self, key, filepath):
+        """이전 기록이 있고 로컬 파일도 남아 있을 때만 조건부 요청 헤더를 만듭니다."""
+        entry = self.entries.get(key)
+        if not entry or not os.path.exists(filepath):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def sync(self, engine, key, url, filepath, min_bytes=500, timeout=TIMEOUT):
+        """
+        이미지 하나를 조건부로 받아 바뀐 경우에만 저장합니다.
+        반환값: UNCHANGED / UPDATED / NEW / GONE / FAILED
+        """
+        headers = self.conditional_headers(key, filepath)
+        previous = self.entries.get(key)
+
+        with engine.get(url, headers=headers, timeout=timeout, stream=True) as r:
+            if r.status_code == 304 and previous:
+                with self.lock:
+                    previous['checked_at'] = int(time.time())
+                return UNCHANGED
+
+            # 내용이 이전 해시와 같으면 파일은 건드리지 않음
+            result = None
+            if r.status_code == 200:
+                result = stream_to_file(r, filepath, min_bytes,
+                                        unless_sha256=previous and previous.get('sha256'))
+            if result is None:
+                # 예전에 있던 이미지가 사라진 경우(404/410)만 GONE.
+                # 200 인데 너무 작은 응답(HTML 오류 페이지 등)은 FAILED - 기록과 로컬 파일을 그대로 둠
+                if previous and r.status_code in (404, 410):
+                    with self.lock:
+                        self.entries.pop(key, None)
+                    return GONE
+                return FAILED
+
+            with self.lock:
+                self.entries[key] = {
+                    'url': url,
+                    'filename': os.path.basename(filepath),
+                    'etag': r.headers.get('ETag'),
+                    'last_modified': r.headers.get('Last-Modified'),
+                    'size': result.size,
+                    'sha256': result.sha256,
+                    'checked_at': int(time.time())
+                }
+
+        if not result.written:
+            return UNCHANGED
+        return UPDATED if previous else NEW
+
+    def drop_missing(self, keys):
+        """이번 목록(keys)에 없는 기록을 지우고 지운 키 목록을 돌려줍니다."""
+        keys = set(keys)
+        with self.lock:
+            gone = [key for key in self.entries if key not in keys]
+            for key in gone:
+                del self.entries[key]
+        return gone
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
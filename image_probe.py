@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+이미지 존재 확인(프로브) + TTL 캐시
+stations.json 의 (역, 노선)마다 추측한 이미지 주소는 상당수가 404 이거나 500바이트 미만 오류 응답이라,
+전체 GET 대신 HEAD(지원하지 않는 호스트는 Range: bytes=0-0 GET)로 먼저 있는지만 확인하고
+있는 것으로 확인된 주소만 내려받습니다.
+
+- 결과는 .cache/probe/images.json 에 주소별로 저장 (있음 7일, 없음 3일 동안 다시 확인하지 않음)
+- HEAD 가 405/501/403 인 호스트는 기록해 두고 다음부터 바로 Range GET 사용
+- 5xx/429, 연결 오류는 '확인 실패'로 남기고 저장하지 않음 (다음 실행에서 다시 확인)
+download_station_images.py, download_images_with_mapping.py 에서 사용
+
+사용법:
+    python image_probe.py stats | clear
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+PROBE_FILE = os.path.join('.cache', 'probe', 'images.json')
+DAY = 24 * 60 * 60
+HIT_TTL = 7 * DAY     # 있는 이미지 (다시 확인하는 간격)
+MISS_TTL = 3 * DAY    # 없는 이미지 - 새로 올라온 이미지를 너무 늦게 찾지 않게 더 짧게
+MIN_BYTES = 500       # 이보다 작은 응답은 오류 이미지로 봄 (engine.download 의 min_bytes 와 같음)
+TIMEOUT = (5, 10)
+
+HEAD = 'head'
+RANGE = 'range'
+# HEAD 를 막거나 구현하지 않은 서버가 돌려주는 상태 코드
+HEAD_UNSUPPORTED = (403, 405, 501)
+CONTENT_RANGE_RE = re.compile(r'/\s*(\d+)\s*$')
+
+
+def response_size(response):
+    """전체 크기: 206 은 Content-Range 의 전체 길이, 그 밖에는 Content-Length. 모르면 None"""
+    if response.status_code == 206:
+        match = CONTENT_RANGE_RE.search(response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def verdict(status, size, min_bytes=MIN_BYTES):
+    """있음 True, 없음 False, 판단할 수 없음(일시적 오류) None"""
+    if status in (200, 206):
+        # 크기를 알려주지 않으면 일단 있는 것으로 보고 내려받을 때 다시 확인
+        return size is None or size >= min_bytes
+    if status == 429 or status >= 500:
+        return None
+    # 404/410 등 나머지 4xx 는 없음
+    return False if status >= 400 else None
+
+
+class ImageProbe:
+    """주소 -> {exists, size, status, method, checked_at}, 호스트 -> 프로브 방식(head/range)"""
+
+    def __init__(self, path=PROBE_FILE, refresh=False, min_bytes=MIN_BYTES):
+        self.path = path
+        self.refresh = refresh
+        self.min_bytes = min_bytes
+        self.entries = {}
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.counts = {'cached': 0, 'head': 0, 'range': 0, 'unknown': 0}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get('urls', {})
+            self.hosts = data.get('hosts', {})
+
+    def cached(self, url, now=None):
+        """TTL 안의 기록이 있으면 True/False, 없거나 지났으면 None"""
+        entry = self.entries.get(url)
+        if entry is None or self.refresh:
+            return None
+        ttl = HIT_TTL if entry['exists'] else MISS_TTL
+        if (now or time.time()) - entry['checked_at'] > ttl:
+            return None
+        return entry['exists']
+
+    def mark(self, url, exists, size=None, status=None, method=None):
+        with self.lock:
+            self.entries[url] = {
+                'exists': exists,
+                'size': size,
+                'status': status,
+                'method': method,
+                'checked_at': int(time.time())
+            }
+
+    def _send(self, engine, url, timeout):
+        """(방식, 상태 코드, 전체 크기) - 본문은 받지 않음"""
+        host = urlparse(url).netloc
+        # replay 모드는 네트워크를 쓰지 않아야 하므로 HEAD 대신 캐시를 거치는 GET 사용
+        replay = engine.cache is not None and engine.cache.mode == 'replay'
+        if not replay and self.hosts.get(host) != RANGE:
+            with engine.head(url, timeout=timeout, allow_redirects=True) as r:
+                if r.status_code not in HEAD_UNSUPPORTED:
+                    return HEAD, r.status_code, response_size(r)
+            with self.lock:
+                first = self.hosts.get(host) != RANGE
+                self.hosts[host] = RANGE
+            if first:
+                print(f"[프로브] {host}: HEAD 미지원 -> Range GET 사용")
+        with engine.get(url, headers={'Range': 'bytes=0-0'}, timeout=timeout, stream=True) as r:
+            return RANGE, r.status_code, response_size(r)
+
+    def probe(self, engine, url, timeout=TIMEOUT):
+        """이미지가 있으면 True, 없으면 False, 확인하지 못하면 None (캐시에 있으면 요청하지 않음)"""
+        exists = self.cached(url)
+        if exists is not None:
+            with self.lock:
+                self.counts['cached'] += 1
+            return exists
+        method, status, size = self._send(engine, url, timeout)
+        exists = verdict(status, size, self.min_bytes)
+        with self.lock:
+            self.counts[method if exists is not None else 'unknown'] += 1
+        if exists is not None:
+            self.mark(url, exists, size, status, method)
+        return exists
+
+    def probe_all(self, engine, urls):
+        """주소 목록을 병렬로 확인해 {주소: True/False/None} 을 돌려주고 결과를 저장합니다."""
+        existence = {}
+        for url, exists, error in engine.map(lambda url: self.probe(engine, url), dict.fromkeys(urls)):
+            if error is not None:
+                with self.lock:
+                    self.counts['unknown'] += 1
+            existence[url] = exists if error is None else None
+        self.save()
+        return existence
+
+    def summary(self, existence):
+        found = sum(1 for exists in existence.values() if exists)
+        missing = sum(1 for exists in existence.values() if exists is False)
+        unknown = sum(1 for exists in existence.values() if exists is None)
+        return (f"프로브: 있음 {found}, 없음 {missing}, 확인 실패 {unknown} "
+                f"(캐시 {self.counts['cached']}, HEAD {self.counts['head']}, Range {self.counts['range']})")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'hosts': self.hosts, 'urls': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def add_arguments(parser):
+    """이미지를 내려받는 스크립트 공통 옵션 (--no-probe, --refresh-probe)"""
+    parser.add_argument('--no-probe', action='store_true',
+                        help='존재 확인 없이 모든 주소를 전체 GET (예전 방식)')
+    parser.add_argument('--refresh-probe', action='store_true',
+                        help=f'{PROBE_FILE} 기록을 무시하고 모두 다시 확인')
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description='이미지 존재 확인 캐시 관리')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--file', default=PROBE_FILE, help=f'캐시 파일 (기본 {PROBE_FILE})')
+    args = parser.parse_args()
+
+    if args.command == 'clear':
+        if os.path.exists(args.file):
+            os.remove(args.file)
+        print(f"[완료] '{args.file}'을 지웠습니다.")
+        return
+
+    probe = ImageProbe(args.file)
+    now = time.time()
+    found = sum(1 for entry in probe.entries.values() if entry['exists'])
+    fresh = sum(1 for url in probe.entries if probe.cached(url, now) is not None)
+    print(f"[프로브 캐시] {args.file}: 주소 {len(probe.entries)}개 (있음 {found}, 없음 {len(probe.entries) - found}), "
+          f"유효 {fresh}개")
+    for host, method in sorted(probe.hosts.items()):
+        print(f"   {host}: {method}")
+
+
+if __name__ == '__main__':
+    main()
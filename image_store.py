@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+내용 주소(content-addressed) 이미지 저장소
+- 이미지는 sha256 해시 이름으로 한 번만 저장: image_store/objects/{해시 앞 2자리}/{해시}.png
+- image_store/index.json 이 매핑 키 -> 해시를 기록
+- station_images/ 의 "{키} ({railOprIsttCd}_{lnCd}_{prprStinCd}.png)" 이름은 인덱스에서 만든 보기(view)
+  (하드링크, 안 되면 복사). 키 변경은 인덱스만 고치고 view를 다시 만들면 됨
+
+사용법:
+    python image_store.py import [폴더]   # 기존 station_images 파일을 저장소로 가져오기
+    python image_store.py view            # 인덱스 기준으로 station_images 다시 만들기
+    python image_store.py gc              # 인덱스에서 참조하지 않는 객체 삭제
+해시 이름 파일은 내용이 바뀌지 않으므로 Cache-Control: immutable 로 서비스할 수 있습니다.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import station_index
+from station_index import VIEW_NAME_RE
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+STORE_DIR = 'image_store'
+VIEW_DIR = 'station_images'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def view_name(key, source_file):
+    """rename_station_images.py 와 같은 규칙: "{키} ({원본 파일명})" """
+    return f"{key} ({source_file})"
+
+
+def link_or_copy(src, dst):
+    """dst를 src의 하드링크로 원자적으로 교체합니다. 하드링크가 안 되면 복사합니다."""
+    folder = os.path.dirname(os.path.abspath(dst))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.', suffix='.part')
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ImageStore:
+    """
+    objects/ 아래 해시 이름 파일과 index.json(키 -> {sha256, file})을 관리합니다.
+    file은 원본 이미지 파일명({railOprIsttCd}_{lnCd}_{prprStinCd}.png)으로 view 이름에 쓰입니다.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.json')
+        self.index = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + '.png')
+
+    def add_file(self, path, sha256=None, move=False):
+        """
+        파일을 저장소에 넣고 해시를 돌려줍니다. 같은 내용이 이미 있으면 새로 저장하지 않습니다.
+        move=True면 원본을 옮기고(임시 다운로드 파일용), 아니면 하드링크/복사합니다.
+        """
+        sha256 = sha256 or file_sha256(path)
+        target = self.object_path(sha256)
+        with self.lock:
+            if os.path.exists(target):
+                if move:
+                    os.remove(path)
+                return sha256
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if move:
+                os.replace(path, target)
+            else:
+                link_or_copy(path, target)
+        return sha256
+
+    def set_key(self, key, sha256, source_file):
+        with self.lock:
+            self.index[key] = {'sha256': sha256, 'file': source_file}
+
+    def rename_key(self, old_key, new_key):
+        """키 변경은 인덱스만 수정합니다 (파일은 build_view()에서 반영)."""
+        with self.lock:
+            self.index[new_key] = self.index.pop(old_key)
+
+    def save(self):
+        tmp_path = self.index_path + '.tmp'
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def build_view(self, view_dir=VIEW_DIR, prune=False):
+        """
+        인덱스 기준으로 view_dir에 사람이 읽는 이름의 파일을 만듭니다.
+        이미 같은 객체를 가리키는 파일은 건드리지 않습니다. 반환: (생성/갱신 수, 삭제 수)
+        """
+        os.makedirs(view_dir, exist_ok=True)
+        wanted = {view_name(key, entry['file']): entry['sha256'] for key, entry in self.index.items()}
+
+        written = 0
+        for name, sha256 in wanted.items():
+            obj = self.object_path(sha256)
+            dst = os.path.join(view_dir, name)
+            if os.path.exists(dst) and (os.path.samefile(obj, dst) or file_sha256(dst) == sha256):
+                continue
+            link_or_copy(obj, dst)
+            written += 1
+
+        removed = 0
+        if prune:
+            for name in os.listdir(view_dir):
+                if VIEW_NAME_RE.match(name) and name not in wanted:
+                    os.remove(os.path.join(view_dir, name))
+                    removed += 1
+        return written, removed
+
+    def gc(self):
+        """인덱스에서 참조하지 않는 객체를 지우고 지운 개수를 돌려줍니다."""
+        used = {entry['sha256'] for entry in self.index.values()}
+        removed = 0
+        for folder, _, files in os.walk(self.objects_dir):
+            for name in files:
+                if os.path.splitext(name)[0] not in used:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+        return removed
+
+
+def import_folder(store, folder, index):
+    """
+    folder의 PNG를 저장소로 가져옵니다.
+    "{키} (원본.png)" 이름은 그대로, "원본.png" 이름은 역 인덱스(station_index.py)로 키를 찾습니다.
+    """
+    imported = 0
+    skipped = 0
+    for name in sorted(os.listdir(folder)):
+        key = index.key_for_image(name)
+        if not key:
+            skipped += 1
+            continue
+        match = VIEW_NAME_RE.match(name)
+        source_file = match.group('file') if match else name
+        sha256 = store.add_file(os.path.join(folder, name))
+        store.set_key(key, sha256, source_file)
+        imported += 1
+    return imported, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='내용 주소 이미지 저장소')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_import = sub.add_parser('import', help='폴더의 이미지를 저장소로 가져오기')
+    p_import.add_argument('folder', nargs='?', default=VIEW_DIR)
+    p_view = sub.add_parser('view', help='인덱스 기준으로 사람이 읽는 이름의 파일 만들기')
+    p_view.add_argument('--dir', default=VIEW_DIR)
+    p_view.add_argument('--prune', action='store_true', help='인덱스에 없는 view 파일 삭제')
+    sub.add_parser('gc', help='참조하지 않는 객체 삭제')
+    args = parser.parse_args()
+
+    store = ImageStore()
+    if args.command == 'import':
+        imported, skipped = import_folder(store, args.folder, station_index.load())
+        store.save()
+        objects = len({entry['sha256'] for entry in store.index.values()})
+        print(f"[OK] {imported}개 가져옴, 건너뜀 {skipped}개 (키 {len(store.index)}개 / 객체 {objects}개)")
+    elif args.command == 'view':
+        written, removed = store.build_view(args.dir, prune=args.prune)
+        print(f"[OK] view 생성/갱신 {written}개, 삭제 {removed}개 -> {args.dir}")
+    elif args.command == 'gc':
+        print(f"[OK] 객체 {store.gc()}개 삭제")
+
+
+if __name__ == '__main__':
+    main()
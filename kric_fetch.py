@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+"""
+KRIC 요청 공용 엔진
+- 스레드 풀로 동시 요청 수(in-flight)를 제한
+- 호스트별 토큰 버킷으로 초당 요청 수를 제한 (고정 time.sleep 대체)
+- 응답 본문을 임시 파일에 나눠 쓰고 다 받은 뒤에만 제자리로 교체 (stream_to_file)
+- --http-cache on/replay 면 http_cache.py 디스크 캐시를 거쳐 요청 (캐시 적중은 속도 제한 없이 바로 응답)
+- --request-log 파일(또는 KRIC_REQUEST_LOG)을 주면 요청마다 계측 한 줄을 JSON Lines 로 기록 (request_log.py)
+- HostCircuitBreakers 를 주면 호스트가 계속 실패할 때 요청을 보내지 않고 바로 CircuitOpen (with_retry 로 재시도)
+- AdaptiveConcurrency 를 map()에 넘기면 지연 시간/오류율을 보고 동시 작업 수를 늘리거나 줄임
+download_mapping_images.py / download_station_images.py / download_images_with_mapping.py 에서 사용
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+import http_cache
+import request_log
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Referer': 'https://hc.kric.go.kr/hc/index.jsp'
+}
+
+MAX_WORKERS = 8       # 동시에 보내는 최대 요청 수
+RATE_PER_SEC = 5.0    # 호스트당 초당 요청 수
+BURST = 5             # 순간적으로 허용하는 요청 수
+CHUNK_SIZE = 64 * 1024
+
+# 일시적 실패로 보고 다시 시도하는 상태 코드
+RETRY_STATUS = (429, 500, 502, 503, 504)
+RETRY_ATTEMPTS = 5
+BACKOFF_BASE = 1.0       # 초, 시도마다 2배 (지터: 0 ~ 상한 사이 임의)
+BACKOFF_CAP = 60.0
+BREAKER_THRESHOLD = 5    # 연속 실패가 이만큼이면 호스트 차단
+BREAKER_COOLDOWN = 30.0  # 차단 후 다시 시험해 보기까지 (시험도 실패하면 2배, 최대 BREAKER_MAX_COOLDOWN)
+BREAKER_MAX_COOLDOWN = 300.0
+
+# mkstemp 임시 파일은 0600 이라 그대로 교체하면 다른 사용자(웹 서버)가 읽지 못함.
+# 보통 파일처럼 0666 & ~umask 로 맞춤 (umask 는 바꿔야 읽히므로 스레드가 생기기 전 import 때 한 번만)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+# stream_to_file() 결과: 받은 바이트 수, sha256, 실제로 파일을 교체했는지 여부
+StreamResult = namedtuple('StreamResult', ['size', 'sha256', 'written'])
+
+
+class TokenBucket:
+    """초당 rate개씩 토큰이 채워지고 최대 burst개까지 쌓이는 버킷."""
+
+    def __init__(self, rate, burst):
+        if not rate > 0:
+            raise ValueError(f"rate 는 0보다 커야 합니다: {rate}")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기합니다."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """URL의 호스트마다 별도의 토큰 버킷을 둡니다."""
+
+    def __init__(self, rate=RATE_PER_SEC, burst=BURST):
+        # 버킷은 호스트별로 나중에 만들어지므로 여기서 먼저 확인 (작업 스레드 안에서 실패하지 않게)
+        if not rate > 0:
+            raise ValueError(f"rate 는 0보다 커야 합니다: {rate}")
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class TransientError(Exception):
+    """다시 시도하면 성공할 수 있는 실패 (RETRY_STATUS 응답)"""
+
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+
+
+class CircuitOpen(Exception):
+    """호스트 차단 중이라 요청을 보내지 않음. retry_at(time.monotonic 기준) 이후 다시 시도"""
+
+    def __init__(self, host, retry_at):
+        super().__init__(f"{host} 차단 중 ({max(0.0, retry_at - time.monotonic()):.0f}초 후 재시도)")
+        self.host = host
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    """
+    호스트 하나의 차단기.
+    closed: 정상. 연속 실패가 threshold 에 이르면 open (cooldown 동안 요청 없이 CircuitOpen).
+    cooldown 이 지나면 요청 하나만 시험으로 보내고(half-open) 성공하면 closed,
+    실패하면 cooldown 을 2배로 늘려 다시 open.
+    """
+
+    def __init__(self, host, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_until = 0.0
+        self.probing = False
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def before(self):
+        """요청을 보내도 되면 그냥 돌아오고, 아니면 CircuitOpen"""
+        with self.lock:
+            if self.state == 'closed':
+                return
+            now = time.monotonic()
+            if now >= self.opened_until and not self.probing:
+                self.probing = True
+                return
+            raise CircuitOpen(self.host, max(self.opened_until, now + 1.0))
+
+    def success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+            self.cooldown = self.base_cooldown
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing:
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.state != 'closed' or self.failures < self.threshold:
+                return
+            self.state = 'open'
+            self.probing = False
+            self.opened_until = time.monotonic() + self.cooldown
+            self.trips += 1
+
+    def release(self):
+        """성공도 실패도 아닌 결과 (시험 요청이면 다른 요청이 다시 시험할 수 있게)"""
+        with self.lock:
+            self.probing = False
+
+
+class HostCircuitBreakers:
+    """URL의 호스트마다 별도의 차단기를 둡니다."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(host, **self.kwargs)
+        return breaker
+
+    def summary(self):
+        trips = {host: breaker.trips for host, breaker in self.breakers.items() if breaker.trips}
+        if not trips:
+            return "호스트 차단 없음"
+        return "호스트 차단: " + ', '.join(f"{host} {count}회" for host, count in sorted(trips.items()))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """attempt(0부터)번째 재시도 전 대기 시간: 0 ~ min(cap, base * 2^attempt) 사이 임의 (full jitter)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def with_retry(func, attempts=RETRY_ATTEMPTS, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    func()를 일시적 실패(TransientError, 연결 오류/시간 초과, CircuitOpen)일 때 다시 부릅니다.
+    대기는 지터를 넣은 지수 백오프, 차단 중이면 차단이 풀릴 때까지. 마지막 실패는 그대로 예외로 전달.
+    """
+    if attempts < 1:
+        # 0이면 func 를 한 번도 부르지 않고 None 을 돌려주게 됨
+        raise ValueError(f"attempts 는 1 이상이어야 합니다: {attempts}")
+    for attempt in range(attempts):
+        try:
+            # 요청 로그의 retries 에 시도 번호를 남김 (첫 시도 0)
+            with request_log.context(retries=attempt):
+                return func()
+        except CircuitOpen as e:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(max(0.0, e.retry_at - time.monotonic()) + backoff_delay(0, base, cap))
+        except (TransientError, requests.ConnectionError, requests.Timeout):
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff_delay(attempt, base, cap))
+
+
+class AdaptiveConcurrency:
+    """
+    지연 시간과 오류율로 동시 작업 수 한도를 조절하는 제어기 (AIMD).
+    WINDOW개 작업이 끝날 때마다 오류율이 ERROR_LIMIT 이상이거나 지연 중앙값이
+    기준(지금까지 창별 중앙값의 최솟값)의 SLOW_FACTOR배를 넘으면 한도를 절반으로 줄이고,
+    아니면 1 늘립니다. 한도는 min_limit ~ max_limit 사이.
+    """
+
+    WINDOW = 20
+    ERROR_LIMIT = 0.1
+    SLOW_FACTOR = 2.0
+
+    def __init__(self, max_limit, min_limit=1, start=2):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.limit = max(self.min_limit, min(self.max_limit, int(start)))
+        self.peak = self.limit
+        self.active = 0
+        self.baseline = None
+        self.increases = self.decreases = 0
+        self._window = []
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """한도 안에서 자리가 날 때까지 기다렸다가 작업 하나를 실행합니다. 예외는 오류로 기록."""
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(time.monotonic() - start, ok)
+
+    def run(self, func, item):
+        with self.slot():
+            return func(item)
+
+    def _record(self, latency, ok):
+        with self._cond:
+            self.active -= 1
+            self._window.append((latency, ok))
+            if len(self._window) >= self.WINDOW:
+                self._adjust()
+            self._cond.notify_all()
+
+    def _adjust(self):
+        median = statistics.median(latency for latency, _ in self._window)
+        error_rate = sum(1 for _, ok in self._window if not ok) / len(self._window)
+        self._window = []
+        if self.baseline is None or median < self.baseline:
+            self.baseline = median
+        if error_rate >= self.ERROR_LIMIT or median > self.baseline * self.SLOW_FACTOR:
+            if self.limit > self.min_limit:
+                self.limit = max(self.min_limit, self.limit // 2)
+                self.decreases += 1
+        elif self.limit < self.max_limit:
+            self.limit += 1
+            self.increases += 1
+            self.peak = max(self.peak, self.limit)
+
+    def summary(self):
+        return (f"동시 작업 한도 {self.limit} (최대 {self.peak}/{self.max_limit}, "
+                f"증가 {self.increases}회, 감소 {self.decreases}회)")
+
+
+class FetchEngine:
+    """
+    동시 요청 엔진.
+    get()은 호스트별 속도 제한을 지키며 스레드마다 별도 세션으로 요청하고,
+    map()은 작업 목록을 최대 workers개씩 병렬로 처리합니다.
+    """
+
+    def __init__(self, workers=MAX_WORKERS, rate=RATE_PER_SEC, burst=BURST, headers=None, cache=None, log=None,
+                 breakers=None):
+        self.workers = max(1, int(workers))
+        self.limiter = HostRateLimiter(rate, burst)
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self.cache = cache if cache is not None and cache.mode != 'off' else None
+        self.log = log
+        self.breakers = breakers
+        self._local = threading.local()
+
+    @classmethod
+    def from_args(cls, args, **kwargs):
+        """add_arguments()로 추가한 명령행 옵션으로 엔진을 만듭니다."""
+        cache = http_cache.from_env()
+        if getattr(args, 'http_cache', None):
+            cache.mode = args.http_cache
+        log = request_log.from_env()
+        if getattr(args, 'request_log', None):
+            log = request_log.RequestLog(args.request_log)
+        return cls(workers=args.workers, rate=args.rate, cache=cache, log=log, **kwargs)
+
+    def session(self):
+        """현재 스레드 전용 requests.Session (세션은 스레드 간에 공유하지 않음)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session() if self.log is None else request_log.LoggedSession(self.log)
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        return self._send(self._get, url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """HEAD 요청 (디스크 캐시는 거치지 않고, 속도 제한/차단기는 적용)"""
+        return self._send(self._head, url, **kwargs)
+
+    def _send(self, send, url, **kwargs):
+        if self.breakers is None:
+            return send(url, **kwargs)
+        # 차단 중인 호스트는 요청 없이 바로 CircuitOpen (시간 초과를 기다리지 않음)
+        breaker = self.breakers.for_url(url)
+        breaker.before()
+        try:
+            response = send(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.failure()
+            raise
+        except Exception:
+            breaker.release()
+            raise
+        if response.status_code in RETRY_STATUS:
+            breaker.failure()
+        else:
+            breaker.success()
+        return response
+
+    def _get(self, url, **kwargs):
+        if self.cache is not None:
+            if self.log is None:
+                return self.cache.get(self.session(), url, acquire=lambda: self.limiter.acquire(url), **kwargs)
+            start = time.perf_counter()
+            with request_log.context(cache='miss'):
+                response = self.cache.get(self.session(), url, acquire=lambda: self.limiter.acquire(url), **kwargs)
+            # 캐시 적중은 세션을 거치지 않으므로 여기서 기록
+            if getattr(response, 'from_cache', False):
+                elapsed = time.perf_counter() - start
+                self.log.record('GET', url, response, ttfb=elapsed, total=elapsed, cache='hit')
+            return response
+        self.limiter.acquire(url)
+        return self.session().get(url, **kwargs)
+
+    def _head(self, url, **kwargs):
+        self.limiter.acquire(url)
+        return self.session().head(url, **kwargs)
+
+    def download(self, url, save_path, min_bytes=0, max_bytes=None, **kwargs):
+        """
+        200 응답만 save_path에 스트리밍 저장합니다.
+        거절(상태 코드, 크기)되면 None, 성공하면 StreamResult를 돌려줍니다.
+        RETRY_STATUS 응답은 TransientError (with_retry 로 감싸면 다시 시도).
+        """
+        response = self.get(url, stream=True, **kwargs)
+        with response:
+            if response.status_code in RETRY_STATUS:
+                raise TransientError(url, response.status_code)
+            if response.status_code != 200:
+                return None
+            return stream_to_file(response, save_path, min_bytes, max_bytes)
+
+    def map(self, func, items, controller=None):
+        """
+        items의 각 항목에 func를 병렬로 적용합니다.
+        완료되는 순서대로 (item, result, error)를 돌려줍니다. 예외는 error로 전달됩니다.
+        controller(AdaptiveConcurrency)를 주면 동시 작업 수를 그 한도에 맞춰 조절합니다.
+        받는 쪽이 중간에 멈추면(Ctrl+C, 예외, break) 아직 시작하지 않은 작업은 취소하고 기다리지 않습니다.
+        """
+        items = list(items)
+        if not items:
+            return
+        workers = self.workers
+        if controller is not None:
+            workers = controller.max_limit
+            func = functools.partial(controller.run, func)
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(items)))
+        try:
+            futures = {pool.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+        finally:
+            # with 블록의 shutdown(wait=True)는 남은 작업을 전부 실행한 뒤에야 돌아옴
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def replace_from_temp(tmp_path, path):
+    """mkstemp 로 만든 임시 파일의 권한을 FILE_MODE 로 맞춘 뒤 path 를 원자적으로 교체합니다."""
+    os.chmod(tmp_path, FILE_MODE)
+    os.replace(tmp_path, path)
+
+
+def stream_to_file(response, save_path, min_bytes=0, max_bytes=None, unless_sha256=None):
+    """
+    응답 본문을 같은 폴더의 임시 파일에 CHUNK_SIZE 단위로 쓰고, 끝까지 받은 뒤에만
+    os.replace()로 save_path를 교체합니다. 중간에 실패해도 기존 파일은 그대로 남습니다.
+    - Content-Length나 받은 크기가 min_bytes 미만 / max_bytes 초과면 None (파일 변경 없음)
+    - 받은 내용의 sha256이 unless_sha256과 같고 파일이 이미 있으면 교체하지 않음 (written=False)
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        length = int(length)
+        if length < min_bytes or (max_bytes is not None and length > max_bytes):
+            return None
+
+    folder = os.path.dirname(os.path.abspath(save_path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.', suffix='.part')
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    return None
+                digest.update(chunk)
+                f.write(chunk)
+        if size < min_bytes:
+            return None
+
+        sha256 = digest.hexdigest()
+        if sha256 == unless_sha256 and os.path.exists(save_path):
+            return StreamResult(size, sha256, False)
+        replace_from_temp(tmp_path, save_path)
+        return StreamResult(size, sha256, True)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def positive_int(value):
+    """argparse type: 1 이상의 정수 (아니면 parser 가 오류 메시지를 내고 종료)"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"정수가 아닙니다: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 이상이어야 합니다: {value}")
+    return number
+
+
+def positive_float(value):
+    """argparse type: 0보다 큰 수 (--rate 0 이면 토큰 버킷이 0으로 나누게 됨)"""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"숫자가 아닙니다: {value}")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"0보다 커야 합니다: {value}")
+    return number
+
+
+def add_arguments(parser):
+    """동시 요청 관련 명령행 옵션을 추가합니다."""
+    parser.add_argument('--workers', type=positive_int, default=MAX_WORKERS,
+                        help=f'동시 요청 수 (기본 {MAX_WORKERS})')
+    parser.add_argument('--rate', type=positive_float, default=RATE_PER_SEC,
+                        help=f'호스트당 초당 요청 수 (기본 {RATE_PER_SEC})')
+    parser.add_argument('--http-cache', choices=http_cache.MODES,
+                        help='디스크 HTTP 캐시: off / on / replay (기본: KRIC_HTTP_CACHE 환경변수, 없으면 off)')
+    parser.add_argument('--request-log', metavar='FILE',
+                        help=f'요청별 계측 로그(JSON Lines) 파일, 예: {request_log.REQUEST_LOG_FILE} '
+                             f'(기본: {request_log.ENV_VAR} 환경변수, 없으면 기록 안 함)')
+    return parser
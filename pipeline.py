@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+데이터 갱신 파이프라인 (단계 DAG)
+손으로 순서대로 돌리던 스크립트를 단계로 묶어 한 번에 실행합니다.
+
+    stations  : stations_etl.py ("import pandas as pd.py" 와 같음)   엑셀 -> stations.json
+    mapping   : harvest_station_mapping.py (get_station_mapping.py)  -> station_prpr_mapping.json
+    images    : download_mapping_images.py --store                    -> image_store/, station_images/ (키 이름)
+    rename    : rename_station_images.py                              -> station_images/ (매핑 키 변경 반영)
+    links     : create_download_links.py                              -> download_image_links.html
+    search    : build_search_index.py                                 -> search_index.json
+
+- 단계마다 입력/출력 파일의 해시와 스크립트 해시를 .cache/pipeline/state.json 에 기록하고,
+  입력이 바뀌었거나 출력이 없어진 단계만 다시 실행합니다.
+- 서로 의존하지 않는 단계(links, search, images)는 동시에 실행합니다.
+- 네트워크에서 받는 단계(mapping, images)는 max_age(7일)가 지나면 입력이 같아도 다시 실행합니다.
+- 단계 출력은 .cache/pipeline/logs/{단계}.log 에 저장하고, 실패하면 마지막 부분을 보여줍니다.
+
+사용법:
+    python pipeline.py                  # 바뀐 단계만
+    python pipeline.py links search     # 지정한 단계(와 필요한 앞 단계)만
+    python pipeline.py --force mapping  # 입력이 같아도 다시 실행
+    python pipeline.py --dry-run        # 무엇을 실행할지만 표시
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from image_store import file_sha256
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+STATE_DIR = os.path.join('.cache', 'pipeline')
+STATE_FILE = os.path.join(STATE_DIR, 'state.json')
+LOG_DIR = os.path.join(STATE_DIR, 'logs')
+MAX_JOBS = 4
+LOG_TAIL_LINES = 20
+
+DAY = 24 * 60 * 60
+WORKBOOK_FILE = '운영기관_역사_코드정보_2025.07.04.xls'
+MAPPING_FILES = ['station_prpr_mapping.json', 'station_prpr_mapping_ok.json']
+
+# name, 명령(스크립트 + 인자), 입력, 출력, 앞 단계, 최대 유효 기간(초, None 이면 입력이 바뀔 때만)
+Stage = namedtuple('Stage', ['name', 'command', 'inputs', 'outputs', 'deps', 'max_age'])
+
+STAGES = [
+    Stage('stations', ['stations_etl.py'],
+          [WORKBOOK_FILE], ['stations.json'], [], None),
+    Stage('mapping', ['harvest_station_mapping.py'],
+          ['stations.json'], ['station_prpr_mapping.json', 'station_line_areas.json'], ['stations'], 7 * DAY),
+    # --store: 저장소에 넣고 "{키} (원본.png)" 보기 이름으로 만듦 (rename 단계가 그대로 가져오는 이름)
+    Stage('images', ['download_mapping_images.py', '--store'],
+          ['stations.json'] + MAPPING_FILES, ['image_store', 'station_images'], ['mapping'], 7 * DAY),
+    Stage('rename', ['rename_station_images.py'],
+          ['stations.json', 'station_images'] + MAPPING_FILES, ['station_images'], ['images'], None),
+    Stage('links', ['create_download_links.py'],
+          ['stations.json'] + MAPPING_FILES, ['download_image_links.html'], ['mapping'], None),
+    Stage('search', ['build_search_index.py'],
+          ['stations.json'] + MAPPING_FILES, ['search_index.json'], ['mapping'], None),
+]
+
+
+class Fingerprints:
+    """
+    파일/폴더 해시. 파일은 내용 sha256 을 (크기, 수정 시각)이 같으면 지난 값으로 재사용하고,
+    폴더는 파일 목록의 (상대 경로, 크기, 수정 시각)으로 만듭니다 (이미지 수천 개를 매번 읽지 않음).
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def file(self, path):
+        stat = os.stat(path)
+        cached = self.known.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        sha256 = file_sha256(path)
+        self.known[path] = [stat.st_size, stat.st_mtime_ns, sha256]
+        return sha256
+
+    def folder(self, path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                stat = os.stat(full)
+                digest.update(f"{os.path.relpath(full, path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+        return 'dir:' + digest.hexdigest()
+
+    def __call__(self, path):
+        if os.path.isdir(path):
+            return self.folder(path)
+        if os.path.isfile(path):
+            return self.file(path)
+        return None
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {'stages': {}, 'files': {}}
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp_path = STATE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def stage_inputs(stage):
+    """스크립트 자체도 입력 (코드를 고치면 다시 실행)"""
+    return [stage.command[0]] + stage.inputs
+
+
+def stale_reason(stage, record, fingerprint, now):
+    """다시 실행해야 하는 이유, 최신이면 None"""
+    if record is None:
+        return '첫 실행'
+    if record.get('command') != stage.command:
+        return '명령 변경'
+    for path in stage_inputs(stage):
+        if record['inputs'].get(path) != fingerprint(path):
+            return f"입력 변경: {path}"
+    for path in stage.outputs:
+        if not os.path.exists(path):
+            return f"출력 없음: {path}"
+    if stage.max_age is not None and now - record['finished_at'] > stage.max_age:
+        return f"{stage.max_age // DAY}일 경과"
+    return None
+
+
+def run_stage(stage):
+    """단계 스크립트를 실행하고 (성공 여부, 걸린 시간, 로그 경로)를 돌려줍니다."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, stage.name + '.log')
+    start = time.monotonic()
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        code = subprocess.call([sys.executable] + stage.command, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return code == 0, time.monotonic() - start, log_path
+
+
+def log_tail(log_path):
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.readlines()[-LOG_TAIL_LINES:]
+
+
+def select_stages(names):
+    """지정한 단계와 그 앞 단계 전부 (STAGES 순서)"""
+    by_name = {stage.name: stage for stage in STAGES}
+    wanted = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in by_name:
+            raise SystemExit(f"[오류] 알 수 없는 단계: {name} ({', '.join(by_name)})")
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in STAGES if stage.name in wanted]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='데이터 갱신 파이프라인 (바뀐 단계만 실행)')
+    parser.add_argument('stages', nargs='*', help='실행할 단계 (기본: 전체)')
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE', help='입력이 같아도 다시 실행할 단계')
+    parser.add_argument('--force-all', action='store_true', help='모든 단계를 다시 실행')
+    parser.add_argument('--dry-run', action='store_true', help='실행하지 않고 계획만 표시')
+    parser.add_argument('-j', '--jobs', type=int, default=MAX_JOBS, help=f'동시에 실행할 단계 수 (기본 {MAX_JOBS})')
+    parser.add_argument('--list', action='store_true', help='단계 목록 표시')
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            deps = ', '.join(stage.deps) or '-'
+            print(f"{stage.name:<9} {' '.join(stage.command):<40} 앞 단계: {deps}")
+        return
+
+    started = time.monotonic()
+    stages = select_stages(args.stages or [stage.name for stage in STAGES])
+    forced = set(args.force)
+    state = load_state()
+    fingerprint = Fingerprints(state.get('files'))
+
+    names = {stage.name for stage in stages}
+    status = {}     # 이름 -> 'ran' / 'skipped' / 'failed' / 'blocked'
+    running = {}    # future -> (단계, 실행 전 입력 해시)
+
+    def ready(stage):
+        """아직 처리하지 않았고 (선택된) 앞 단계가 모두 끝난 단계"""
+        if stage.name in status or any(s.name == stage.name for s, _ in running.values()):
+            return False
+        return all(dep in status for dep in stage.deps if dep in names)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while len(status) < len(stages):
+            for stage in stages:
+                if not ready(stage):
+                    continue
+                if any(status.get(dep) in ('failed', 'blocked') for dep in stage.deps):
+                    status[stage.name] = 'blocked'
+                    print(f"[중단] {stage.name}: 앞 단계 실패")
+                    continue
+                record = state['stages'].get(stage.name)
+                now = time.time()
+                reason = ('강제 실행' if args.force_all or stage.name in forced
+                          else stale_reason(stage, record, fingerprint, now))
+                if reason is None:
+                    status[stage.name] = 'skipped'
+                    print(f"[최신] {stage.name}")
+                    continue
+                if args.dry_run:
+                    status[stage.name] = 'ran'
+                    print(f"[실행 예정] {stage.name}: {reason}")
+                    continue
+                inputs = {path: fingerprint(path) for path in stage_inputs(stage)}
+                print(f"[실행] {stage.name}: {reason} ({' '.join(stage.command)})")
+                running[pool.submit(run_stage, stage)] = (stage, inputs)
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, inputs = running.pop(future)
+                ok, seconds, log_path = future.result()
+                if not ok:
+                    status[stage.name] = 'failed'
+                    print(f"[실패] {stage.name} ({seconds:.1f}초) - 로그: {log_path}")
+                    for line in log_tail(log_path):
+                        print(f"   | {line.rstrip()}")
+                    continue
+                # 자기 입력을 고치는 단계(rename: station_images)는 실행 뒤 해시를 기록
+                for path in stage.outputs:
+                    if path in inputs:
+                        inputs[path] = fingerprint(path)
+                state['stages'][stage.name] = {
+                    'command': stage.command,
+                    'inputs': inputs,
+                    'outputs': {path: fingerprint(path) for path in stage.outputs},
+                    'finished_at': time.time(),
+                    'seconds': round(seconds, 2)
+                }
+                status[stage.name] = 'ran'
+                print(f"[완료] {stage.name} ({seconds:.1f}초)")
+                state['files'] = fingerprint.known
+                save_state(state)
+
+    if not args.dry_run:
+        state['files'] = fingerprint.known
+        save_state(state)
+
+    counts = {key: sum(1 for value in status.values() if value == key) for key in ('ran', 'skipped', 'failed', 'blocked')}
+    print("\n" + "="*50)
+    print(f"[결과] 실행 {counts['ran']}, 최신 {counts['skipped']}, 실패 {counts['failed']}, 중단 {counts['blocked']} "
+          f"({time.monotonic() - started:.1f}초)")
+    if counts['failed'] or counts['blocked']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
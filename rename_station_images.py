@@ -1,50 +1,90 @@
 # -*- coding: utf-8 -*-
 """
-station_images 폴더의 PNG 파일명을 station_prpr_mapping.json 키 이름으로 변경.
+station_images 폴더의 PNG를 station_prpr_mapping.json 키 이름으로 보여주기.
 새 이름: "{키} (기존파일명).png"
 예: S1_4_0477.png -> S1_4_이촌 (S1_4_0477).png
+
+파일을 직접 바꾸지 않고 image_store.py 저장소를 사용합니다.
+1. 새로 받은 원본 파일(S1_4_0477.png)은 해시 이름으로 저장소에 옮기고, 이미 있는 보기 파일은 링크만 함
+   (같은 내용은 한 번만 저장)
+2. 매핑 파일 기준으로 인덱스의 키만 갱신 (메타데이터 작업)
+3. 인덱스에서 바뀐 이름만 station_images 에 다시 만듦
 """
 
-import json
 import os
 import sys
 
+import station_index
+from image_store import ImageStore
+from station_index import VIEW_NAME_RE
+
 if sys.platform == 'win32':
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
 
-MAPPING_FILE = 'station_prpr_mapping.json'
 IMAGES_DIR = 'station_images'
 
-with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
-    mapping = json.load(f)
-
 # (railOprIsttCd, lnCd, prprStinCd) -> key
-file_to_key = {}
-for key, info in mapping.items():
-    rail = info['railOprIsttCd']
-    ln = info['lnCd']
-    prpr = info['prprStinCd']
-    fname = f"{rail}_{ln}_{prpr}.png"
-    file_to_key[fname] = key
-
-renamed = 0
+index = station_index.load()
+
+store = ImageStore()
+
+
+def in_store(key, path):
+    """이미 인덱스의 객체를 가리키는 보기 파일인지 (다시 해시하지 않음)"""
+    entry = store.index.get(key)
+    if not entry:
+        return False
+    obj = store.object_path(entry['sha256'])
+    return os.path.exists(obj) and os.path.samefile(obj, path)
+
+
+# 1. 원본 파일(S1_4_0477.png)과 이미 만든 보기 파일("{키} (S1_4_0477.png)") 가져오기
+imported = 0
+unchanged = 0
 skipped = 0
-for filename in os.listdir(IMAGES_DIR):
-    if not filename.lower().endswith('.png'):
-        continue
-    if filename in file_to_key:
-        key = file_to_key[filename]
-        new_name = f"{key} ({filename})"
-        old_path = os.path.join(IMAGES_DIR, filename)
-        new_path = os.path.join(IMAGES_DIR, new_name)
-        if old_path != new_path:
-            os.rename(old_path, new_path)
-            renamed += 1
-            print(f"[OK] {filename} -> {new_name}")
-    else:
+stored = set()  # 내용이 저장소에 있는 파일 이름
+for filename in sorted(os.listdir(IMAGES_DIR)):
+    path = os.path.join(IMAGES_DIR, filename)
+    key = index.key_for_image(filename)
+    if not key:
         skipped += 1
         print(f"[SKIP] {filename} (매핑 없음)")
+        continue
+    match = VIEW_NAME_RE.match(filename)
+    if match and in_store(key, path):
+        unchanged += 1
+    elif match:
+        # 보기 파일은 옮기지 않음 - 저장소에 링크만 하고 이름은 build_view 가 맞춤
+        store.set_key(key, store.add_file(path), match.group('file'))
+        imported += 1
+        print(f"[OK] {filename} -> {key}")
+    else:
+        # 새로 받은 원본 파일은 저장소로 옮김
+        store.set_key(key, store.add_file(path, move=True), filename)
+        imported += 1
+        print(f"[OK] {filename} -> {key}")
+    stored.add(filename)
+
+# 2. 매핑 키가 바뀐 항목은 인덱스만 수정
+rekeyed = 0
+for key, entry in list(store.index.items()):
+    new_key = index.key_for_image(entry['file'])
+    if new_key and new_key != key:
+        store.rename_key(key, new_key)
+        rekeyed += 1
+        print(f"[KEY] {key} -> {new_key}")
+
+store.save()
+
+# 3. 사람이 읽는 이름 다시 만들기
+# 저장소에 든 파일이 없거나 저장소에 없는 보기 파일이 남아 있으면 지우지 않음 (내용을 잃지 않게)
+views = [name for name in os.listdir(IMAGES_DIR) if VIEW_NAME_RE.match(name)]
+prune = bool(stored) and all(name in stored for name in views)
+renamed, removed = store.build_view(IMAGES_DIR, prune=prune)
+if not prune:
+    print("[안내] 저장소가 폴더 전체를 담고 있지 않아 이전 이름 파일은 지우지 않았습니다.")
 
 print("\n" + "="*50)
-print(f"변경: {renamed}개, 매핑 없음: {skipped}개")
+print(f"가져옴: {imported}개, 그대로: {unchanged}개, 키 변경: {rekeyed}개, 매핑 없음: {skipped}개")
+print(f"변경: {renamed}개, 정리: {removed}개")
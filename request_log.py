@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+요청별 계측 로그 (JSON Lines)
+FetchEngine 세션에 붙여, 요청 하나가 끝날 때마다 한 줄을 덧붙입니다.
+    {"ts", "method", "url", "endpoint", "station", "status", "bytes",
+     "dns_ms", "connect_ms", "ttfb_ms", "total_ms", "retries", "cache", "reused", "error"}
+- dns_ms / connect_ms: 새 연결을 만들 때만 (재사용 연결은 0, reused=true).
+  dns_ms 는 연결 직전에 같은 호스트를 따로 조회해 잰 값, connect_ms 는 이름 조회 + TCP + TLS 전체
+- ttfb_ms: 요청을 보내고 응답 헤더를 받기까지, total_ms: 본문을 다 읽을 때까지 (stream=True 는 응답을 닫을 때)
+- cache: http_cache 적중이면 "hit", 캐시를 켠 상태에서 네트워크로 받았으면 "miss", 캐시를 안 쓰면 null
+- station: 스크립트가 request_log.context(station=키) 로 지정한 역 키
+- retries: 같은 작업의 몇 번째 재시도인지 (kric_fetch.with_retry, 첫 시도는 0)
+로그는 켤 때만 씁니다 (기본 꺼짐): --request-log 파일, 또는 환경변수 KRIC_REQUEST_LOG=파일
+
+사용법:
+    python download_mapping_images.py --request-log requests.jsonl
+    KRIC_REQUEST_LOG=requests.jsonl python crawl_nursing_room_images.py
+    python request_log.py summary requests.jsonl [--top 15]   # 지연 분포, 느린 엔드포인트 표
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from http_cache import SECRET_PARAMS_RE
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+REQUEST_LOG_FILE = 'requests.jsonl'
+ENV_VAR = 'KRIC_REQUEST_LOG'
+
+# 엔드포인트 이름: 숫자가 든 경로 조각(역 코드, 이미지 파일명)은 {id} 로 묶음
+ID_SEGMENT_RE = re.compile(r'[^/]*\d[^/]*')
+HISTOGRAM_MS = [50, 100, 200, 500, 1000, 2000, 5000, 10000]
+BAR_WIDTH = 40
+
+# 스레드별: 지금 요청의 새 연결 시간, 스크립트가 지정한 필드(station 등)
+_local = threading.local()
+
+
+def endpoint_of(url):
+    """https://hc.kric.go.kr/hc/ext/.../cnv/S1/S1_4_0477.png -> hc.kric.go.kr/hc/ext/.../cnv/{id}/{id}"""
+    parsed = urlparse(url)
+    return parsed.netloc + ID_SEGMENT_RE.sub('{id}', parsed.path)
+
+
+@contextmanager
+def context(**fields):
+    """이 블록 안에서 이 스레드가 보내는 요청 로그에 fields(예: station=키)를 붙입니다."""
+    previous = getattr(_local, 'fields', {})
+    _local.fields = dict(previous, **fields)
+    try:
+        yield
+    finally:
+        _local.fields = previous
+
+
+def current_fields():
+    return getattr(_local, 'fields', {})
+
+
+# ----- 연결 시간 측정 -----
+
+class _TimedConnection:
+    def connect(self):
+        start = time.perf_counter()
+        host = getattr(self, '_dns_host', self.host)
+        try:
+            socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            pass    # 실제 오류는 아래 연결에서 원래 방식대로 발생
+        dns = time.perf_counter() - start
+        super().connect()
+        _local.connect = {'dns_ms': round(dns * 1000, 1),
+                          'connect_ms': round((time.perf_counter() - start - dns) * 1000, 1)}
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """새 연결의 이름 조회/연결 시간을 재는 커넥션 풀을 쓰는 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+# ----- 로그 -----
+
+class RequestLog:
+    """JSON Lines 파일에 덧붙이는 스레드 안전 기록기"""
+
+    def __init__(self, path=REQUEST_LOG_FILE):
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def record(self, method, url, response=None, error=None, timing=None, ttfb=None, total=None, cache=None):
+        timing = timing or {}
+        fields = current_fields()
+        entry = {
+            'ts': round(time.time(), 3),
+            'method': method,
+            'url': SECRET_PARAMS_RE.sub(r'\1***', url),
+            'endpoint': endpoint_of(url),
+            'station': None,
+            'status': response.status_code if response is not None else None,
+            'bytes': response_bytes(response),
+            'dns_ms': timing.get('dns_ms', 0.0),
+            'connect_ms': timing.get('connect_ms', 0.0),
+            'ttfb_ms': round(ttfb * 1000, 1) if ttfb is not None else None,
+            'total_ms': round(total * 1000, 1) if total is not None else None,
+            # kric_fetch.with_retry 가 context(retries=시도 번호)로 알려 준 재시도 + urllib3 자체 재시도
+            'retries': fields.get('retries', 0) + response_retries(response),
+            'cache': cache,
+            'reused': response is not None and cache != 'hit' and not timing,
+            'error': str(error)[:200] if error is not None else None
+        }
+        entry.update((key, value) for key, value in fields.items() if key != 'retries')
+        self.write(entry)
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+
+    def summary(self):
+        return f"요청 로그: {self.count}건 -> '{self.path}' (python request_log.py summary {self.path})"
+
+
+def response_bytes(response):
+    if response is None:
+        return None
+    if getattr(response, '_content', False):
+        return len(response._content)
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        try:
+            return raw.tell()
+        except Exception:
+            return None
+    return None
+
+
+def response_retries(response):
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    return len(retries.history) if retries is not None else 0
+
+
+class LoggedSession(requests.Session):
+    """요청마다 RequestLog 에 한 줄씩 쓰는 세션 (http_cache 적중은 FetchEngine 이 따로 기록)"""
+
+    def __init__(self, log):
+        super().__init__()
+        self.request_log = log
+        adapter = TimingAdapter()
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def send(self, request, **kwargs):
+        _local.connect = None
+        start = time.perf_counter()
+        cache = current_fields().get('cache')
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            self.request_log.record(request.method, request.url, error=e, timing=_local.connect,
+                                    total=time.perf_counter() - start, cache=cache)
+            raise
+        timing = _local.connect
+        ttfb = response.elapsed.total_seconds()
+        fields = current_fields()
+        if not kwargs.get('stream'):
+            self.request_log.record(request.method, request.url, response, timing=timing, ttfb=ttfb,
+                                    total=time.perf_counter() - start, cache=cache)
+            return response
+
+        # stream=True: 본문을 다 읽고 닫을 때 기록
+        close = response.close
+        log = self.request_log
+
+        def close_and_record():
+            close()
+            with context(**fields):
+                log.record(request.method, request.url, response, timing=timing, ttfb=ttfb,
+                           total=time.perf_counter() - start, cache=cache)
+            response.close = close
+
+        response.close = close_and_record
+        return response
+
+
+def from_env():
+    """환경변수 KRIC_REQUEST_LOG 에 파일이 지정돼 있으면 RequestLog, 아니면 None"""
+    path = os.environ.get(ENV_VAR, '').strip()
+    return RequestLog(path) if path else None
+
+
+# ----- 요약 -----
+
+def read_entries(path):
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and 'total_ms' in entry:
+                entries.append(entry)
+    return entries
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100 * len(ordered))) - 1)]
+
+
+def histogram(values):
+    counts = [0] * (len(HISTOGRAM_MS) + 1)
+    for value in values:
+        counts[next((i for i, edge in enumerate(HISTOGRAM_MS) if value < edge), len(HISTOGRAM_MS))] += 1
+    lines = []
+    peak = max(counts) or 1
+    lower = 0
+    for i, count in enumerate(counts):
+        label = f"{lower}-{HISTOGRAM_MS[i]} ms" if i < len(HISTOGRAM_MS) else f"{lower} ms 이상"
+        lines.append(f"   {label:>15} {count:>6}  {'#' * round(count / peak * BAR_WIDTH)}")
+        lower = HISTOGRAM_MS[i] if i < len(HISTOGRAM_MS) else lower
+    return lines
+
+
+def summarize(path, top):
+    entries = read_entries(path)
+    if not entries:
+        print(f"[요약] '{path}'에 기록이 없습니다.")
+        return
+    network = [e for e in entries if e.get('cache') != 'hit' and e.get('total_ms') is not None]
+    span = max(e['ts'] for e in entries) - min(e['ts'] for e in entries)
+    errors = sum(1 for e in entries if e.get('error') or (e.get('status') or 0) >= 400)
+    hits = sum(1 for e in entries if e.get('cache') == 'hit')
+    retried = sum(1 for e in entries if e.get('retries'))
+    print(f"[요약] '{path}': 요청 {len(entries)}건 (네트워크 {len(network)}, 캐시 적중 {hits}, 오류/4xx/5xx {errors}, "
+          f"재시도 {retried}), "
+          f"기간 {span:.1f}초, {sum(e.get('bytes') or 0 for e in entries) / 1e6:.1f} MB")
+
+    totals = [e['total_ms'] for e in network]
+    print(f"\n[지연 분포] 네트워크 요청 total_ms (p50 {percentile(totals, 50):.0f} ms, "
+          f"p95 {percentile(totals, 95):.0f} ms, p99 {percentile(totals, 99):.0f} ms)")
+    for line in histogram(totals):
+        print(line)
+
+    phases = {
+        '이름 조회(dns)': sum(e.get('dns_ms') or 0 for e in network),
+        '연결(connect)': sum(e.get('connect_ms') or 0 for e in network),
+        '첫 바이트(ttfb)': sum(max(0.0, (e.get('ttfb_ms') or 0) - (e.get('dns_ms') or 0) - (e.get('connect_ms') or 0))
+                          for e in network),
+        '본문(body)': sum(max(0.0, e['total_ms'] - (e.get('ttfb_ms') or 0)) for e in network),
+    }
+    all_time = sum(phases.values()) or 1
+    print("\n[구간별 시간] (모든 요청 합계)")
+    for name, value in phases.items():
+        print(f"   {name:<14} {value / 1000:9.1f}초  {value / all_time:6.1%}")
+
+    by_endpoint = {}
+    for entry in entries:
+        by_endpoint.setdefault(entry['endpoint'], []).append(entry)
+    rows = []
+    for endpoint, items in by_endpoint.items():
+        times = [e['total_ms'] for e in items if e.get('cache') != 'hit' and e.get('total_ms') is not None]
+        rows.append((sum(times), endpoint, items, times))
+    rows.sort(reverse=True)
+    total_time = sum(row[0] for row in rows) or 1
+    print(f"\n[느린 엔드포인트] 총 시간 순 상위 {top}")
+    print(f"   {'건수':>6} {'오류':>5} {'적중':>5} {'p50':>7} {'p95':>7} {'p99':>7} {'최대':>7} {'MB':>7} {'비중':>6}  엔드포인트")
+    for spent, endpoint, items, times in rows[:top]:
+        failed = sum(1 for e in items if e.get('error') or (e.get('status') or 0) >= 400)
+        hit = sum(1 for e in items if e.get('cache') == 'hit')
+        size = sum(e.get('bytes') or 0 for e in items) / 1e6
+        print(f"   {len(items):>6} {failed:>5} {hit:>5} {percentile(times, 50):>7.0f} {percentile(times, 95):>7.0f} "
+              f"{percentile(times, 99):>7.0f} {max(times, default=0):>7.0f} {size:>7.1f} {spent / total_time:>6.1%}  {endpoint}")
+
+    print(f"\n[가장 느린 요청] 상위 {top}")
+    for entry in sorted(network, key=lambda e: e['total_ms'], reverse=True)[:top]:
+        status = entry.get('status') or entry.get('error') or '-'
+        station = f" [{entry['station']}]" if entry.get('station') else ''
+        print(f"   {entry['total_ms']:>8.0f} ms  {str(status)[:40]:<6} {entry['url'][:90]}{station}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='요청 로그(JSON Lines) 요약')
+    sub = parser.add_subparsers(dest='command', required=True)
+    summary_parser = sub.add_parser('summary', help='지연 분포와 느린 엔드포인트 표')
+    summary_parser.add_argument('path', nargs='?', default=REQUEST_LOG_FILE)
+    summary_parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        summarize(args.path, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+서울 열린데이터 수유실 API(getFcNrsrm) 전체 조회
+한 번에 받을 수 있는 범위(PAGE_SIZE)를 넘으면 나머지 행이 잘리므로,
+첫 페이지에서 totalCount를 읽고 나머지 범위(/1001/2000/, ...)를 동시에 받아 순서대로 합칩니다.
+결과는 한 번에 받은 것과 같은 구조(response.body.items.item, totalCount)입니다.
+seoul_proxy.py / build_nursing_rooms.py 에서 사용
+
+사용법:
+    import seoul_api
+    payload = seoul_api.fetch_all(seoul_api.api_url(KEY))
+    rows = seoul_api.extract_items(payload)
+"""
+
+import re
+from contextlib import closing
+
+from http_cache import SECRET_PARAMS_RE
+from kric_fetch import FetchEngine
+
+SEOUL_API_URL = 'http://openapi.seoul.go.kr:8088/{key}/json/getFcNrsrm/{start}/{end}/'
+PAGE_SIZE = 1000     # 서울 API 한 번 호출의 최대 행 수
+PAGE_WORKERS = 4     # 동시에 받는 페이지 수
+PAGE_RATE = 10.0     # 초당 요청 수
+TIMEOUT = 30
+# 주소 경로에 들어가는 API 키 (.../{key}/json/getFcNrsrm/...)
+KEY_SEGMENT_RE = re.compile(r'[^/\s]+(?=/json/getFcNrsrm/)')
+
+
+def api_url(api_key):
+    """API 키를 넣은 주소 틀 ({start}/{end} 는 그대로)"""
+    return SEOUL_API_URL.format(key=api_key, start='{start}', end='{end}')
+
+
+def redact(text):
+    """오류 메시지/로그에 들어간 주소의 API 키를 *** 로 가립니다 (경로의 키, serviceKey= 등)."""
+    return SECRET_PARAMS_RE.sub(r'\1***', KEY_SEGMENT_RE.sub('***', str(text)))
+
+
+def page_ranges(total, page_size=PAGE_SIZE):
+    """[(1, 1000), (1001, 2000), ...] (1부터 시작, 끝 포함)"""
+    return [(start, min(start + page_size - 1, total)) for start in range(1, total + 1, page_size)]
+
+
+def extract_items(payload):
+    """response.body.items.item (배열 또는 단일 객체)"""
+    body = (payload.get('response') or {}).get('body') or {}
+    items = (body.get('items') or {}).get('item')
+    if isinstance(items, dict):
+        return [items]
+    return items or []
+
+
+def total_count(payload):
+    body = (payload.get('response') or {}).get('body') or {}
+    try:
+        return int(body.get('totalCount'))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_page(engine, url_template, start, end, timeout=TIMEOUT):
+    response = engine.get(url_template.format(start=start, end=end), timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_all(url_template, page_size=PAGE_SIZE, workers=PAGE_WORKERS, engine=None):
+    """
+    첫 페이지의 totalCount 로 나머지 범위를 정해 workers 개씩 동시에 받고,
+    행을 범위 순서대로 합친 payload 를 돌려줍니다. 한 페이지라도 실패하면 예외를 던집니다 (잘린 결과를 돌려주지 않음).
+    """
+    engine = engine or FetchEngine(workers=workers, rate=PAGE_RATE, burst=workers, headers={})
+    first = fetch_page(engine, url_template, 1, page_size)
+    total = total_count(first)
+    ranges = page_ranges(total, page_size)[1:] if total else []
+
+    pages = {1: extract_items(first)}
+    # 실패하면 바로 map 을 닫아 남은 페이지 요청은 보내지 않음
+    with closing(engine.map(lambda r: fetch_page(engine, url_template, r[0], r[1]), ranges)) as results:
+        for (start, end), payload, error in results:
+            if error is not None:
+                raise RuntimeError(f"getFcNrsrm {start}~{end} 조회 실패: {error}") from error
+            pages[start] = extract_items(payload)
+
+    rows = [row for start in sorted(pages) for row in pages[start]]
+    body = first.setdefault('response', {}).setdefault('body', {})
+    body['items'] = {'item': rows}
+    body['numOfRows'] = len(rows)
+    body['pageNo'] = 1
+    if total is None:
+        body['totalCount'] = len(rows)
+    return first
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+/seoulapi 프록시 (api.info-zip.kr/seoulapi 와 같은 동작을 로컬에서 실행)
+브라우저 대신 서울 열린데이터 API(getFcNrsrm)를 호출하고, 응답을 그대로(같은 JSON 구조) 돌려줍니다.
+- 응답을 메모리 + 디스크(.cache/seoulapi/)에 저장하고 TTL 동안은 서울 API를 다시 부르지 않음
+- TTL이 지나면 저장된 응답을 바로 주고 뒤에서 새로 받음 (stale-while-revalidate, 최대 STALE_TTL 까지)
+- 캐시가 없을 때 동시에 들어온 요청은 서울 API 호출 한 번을 같이 기다림 (single-flight)
+- gzip 압축, ETag / If-None-Match -> 304 지원
+- 서울 API는 seoul_api.fetch_all() 로 totalCount 만큼 여러 범위를 동시에 받아 합침 (1000행 넘어도 잘리지 않음)
+API 키는 서버(환경변수 SEOUL_API_KEY)에만 두고 브라우저에는 노출하지 않습니다.
+
+사용법:
+    SEOUL_API_KEY=KEY python seoul_proxy.py --port 8080
+    python seoul_proxy.py --upstream http://127.0.0.1:9000/stub.json   # 스텁 서버로 시험
+    python seoul_proxy.py --upstream "http://127.0.0.1:9000/{start}/{end}/"   # 스텁 서버 (페이지 나눠 받기)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import seoul_api
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+CACHE_DIR = os.path.join('.cache', 'seoulapi')
+CACHE_NAME = 'getFcNrsrm'
+ROUTE = '/seoulapi'
+
+TTL = 6 * 60 * 60              # 이 시간 동안은 서울 API를 다시 부르지 않음
+STALE_TTL = 7 * 24 * 60 * 60   # 서울 API 장애 시 오래된 응답이라도 주는 최대 시간
+UPSTREAM_TIMEOUT = 30
+GZIP_MIN_BYTES = 1024
+
+
+class CacheEntry:
+    """저장된 응답 하나 (원본 JSON 바이트, gzip 바이트, ETag, 받은 시각)"""
+
+    def __init__(self, body, fetched_at):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6)
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.fetched_at = fetched_at
+
+    def age(self, now=None):
+        return (now or time.time()) - self.fetched_at
+
+
+class ResponseCache:
+    """
+    이름별 응답 캐시. fetch() 가 돌려준 JSON 바이트를 메모리와 디스크에 보관합니다.
+    get() 은 신선하면 바로, TTL이 지났으면 오래된 응답을 주면서 백그라운드로 갱신,
+    없거나 STALE_TTL 도 지났으면 서울 API를 호출합니다 (같은 이름의 동시 호출은 한 번만).
+    """
+
+    def __init__(self, fetch, cache_dir=CACHE_DIR, ttl=TTL, stale_ttl=STALE_TTL):
+        self.fetch = fetch
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name + '.json')
+
+    def _load_disk(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            body = f.read()
+        return CacheEntry(body, os.path.getmtime(path))
+
+    def _save_disk(self, name, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(entry.body)
+        os.replace(tmp_path, path)
+        os.utime(path, (entry.fetched_at, entry.fetched_at))
+
+    def _refresh(self, name):
+        """
+        서울 API를 호출해 캐시를 갱신합니다. 같은 이름으로 이미 호출 중이면 그 결과를 기다립니다.
+        실패하면 예외를 다시 던집니다 (기다리던 요청에도 같은 예외).
+        """
+        with self._lock:
+            flight = self._inflight.get(name)
+            leader = flight is None
+            if leader:
+                flight = {'done': threading.Event(), 'entry': None, 'error': None}
+                self._inflight[name] = flight
+
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['entry']
+
+        try:
+            body = self.fetch()
+            json.loads(body)  # 깨진 응답은 저장하지 않음
+            entry = CacheEntry(body, time.time())
+            self._save_disk(name, entry)
+            with self._lock:
+                self._entries[name] = entry
+            flight['entry'] = entry
+            return entry
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[name]
+            flight['done'].set()
+
+    def _refresh_background(self, name):
+        with self._lock:
+            if name in self._inflight:
+                return
+
+        def run():
+            try:
+                self._refresh(name)
+            except Exception as e:
+                print(f"   [갱신 실패] {name}: {seoul_api.redact(e)[:100]} (저장된 응답 계속 사용)")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get(self, name):
+        """(CacheEntry, 상태) - 상태: 'HIT' / 'STALE' / 'MISS'"""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            entry = self._load_disk(name)
+            if entry is not None:
+                with self._lock:
+                    self._entries.setdefault(name, entry)
+
+        if entry is not None:
+            age = entry.age()
+            if age < self.ttl:
+                return entry, 'HIT'
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_background(name)
+                return entry, 'STALE'
+        try:
+            return self._refresh(name), 'MISS'
+        except Exception:
+            if entry is None:
+                raise
+            # 아주 오래된 응답이라도 없는 것보다 나음
+            return entry, 'STALE'
+
+
+def fetch_upstream(url, timeout=UPSTREAM_TIMEOUT):
+    """
+    서울 API(또는 스텁) 응답 본문(JSON 바이트)을 받아옵니다.
+    주소에 {start}/{end} 가 있으면 전체 범위를 나눠 받아 합칩니다.
+    """
+    if '{start}' in url:
+        payload = seoul_api.fetch_all(url)
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def upstream_status(error):
+    """서울 API가 돌려준 HTTP 상태 코드 (원인 예외까지 확인), 응답이 없었으면 None"""
+    while error is not None:
+        response = getattr(error, 'response', None)
+        if response is not None:
+            return response.status_code
+        error = error.__cause__
+    return None
+
+
+def make_handler(cache, max_age):
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            print(f"[{self.log_date_time_string()}] {fmt % args}")
+
+        def _send(self, status, body=b'', headers=None):
+            self.send_response(status)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body and self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def do_OPTIONS(self):
+            self._send(204, headers={'Access-Control-Allow-Methods': 'GET, HEAD, OPTIONS',
+                                     'Access-Control-Allow-Headers': 'If-None-Match'})
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0].rstrip('/') != ROUTE:
+                self._send(404, b'{"error":"not found"}', {'Content-Type': 'application/json; charset=utf-8'})
+                return
+            try:
+                entry, status = cache.get(CACHE_NAME)
+            except Exception as e:
+                # 예외 메시지에는 API 키가 든 주소가 있으므로 브라우저에는 상태 코드만 전달
+                print(f"   [서울 API 오류] {seoul_api.redact(e)[:200]}")
+                body = json.dumps({'error': 'upstream error', 'status': upstream_status(e)}).encode('utf-8')
+                self._send(502, body, {'Content-Type': 'application/json; charset=utf-8'})
+                return
+
+            headers = {
+                'ETag': entry.etag,
+                'Cache-Control': f'public, max-age={max_age}',
+                'Vary': 'Accept-Encoding',
+                'X-Cache': status,
+                'Age': str(int(entry.age()))
+            }
+            if entry.etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self._send(304, headers=headers)
+                return
+
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+            body = entry.body
+            if 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) >= GZIP_MIN_BYTES:
+                body = entry.gzipped
+                headers['Content-Encoding'] = 'gzip'
+            self._send(200, body, headers)
+
+    return ProxyHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/seoulapi 캐시 프록시')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--api-key', default=os.environ.get('SEOUL_API_KEY'),
+                        help='서울 열린데이터 API 키 (기본: SEOUL_API_KEY 환경변수)')
+    parser.add_argument('--upstream', help='서울 API 대신 호출할 주소 (스텁 서버 시험용)')
+    parser.add_argument('--ttl', type=int, default=TTL, help=f'캐시 유지 시간(초, 기본 {TTL})')
+    parser.add_argument('--stale-ttl', type=int, default=STALE_TTL,
+                        help=f'TTL 이후 오래된 응답을 주며 갱신하는 시간(초, 기본 {STALE_TTL})')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.upstream:
+        url = args.upstream
+    elif args.api_key:
+        url = seoul_api.api_url(args.api_key)
+    else:
+        parser.error('--api-key(또는 SEOUL_API_KEY) 나 --upstream 이 필요합니다.')
+
+    cache = ResponseCache(lambda: fetch_upstream(url), args.cache_dir, args.ttl, args.stale_ttl)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cache, min(args.ttl, 300)))
+    print(f"[시작] http://{args.host}:{args.port}{ROUTE} (TTL {args.ttl}초, 캐시 '{args.cache_dir}')")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[종료]")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+서비스 워커(sw.js) 생성 - build_bundle.py 에서 사용
+- 미리 캐시(precache): index.html, 해시 이름 데이터 파일, 역별 모달 크기 WebP
+- 해시 이름 파일(data/, station_images_opt/, station_tiles/): 캐시 우선 (내용이 바뀌면 이름이 바뀜)
+- 수유실 API(/seoulapi)와 원본 이미지(station_images/): stale-while-revalidate (캐시를 먼저 주고 뒤에서 갱신)
+- 캐시 이름에 버전(precache 목록 해시)을 넣고, 새 버전이 활성화되면 이전 버전 캐시를 지움
+"""
+
+import hashlib
+import json
+import os
+
+SW_FILE = 'sw.js'
+CACHE_PREFIX = 'nursingroom'
+PRECACHE_IMAGE_WIDTH = 720   # 모달에 쓰는 폭 (build_images.WIDTHS 중 이 값 이하에서 가장 큰 것)
+MAX_IMAGE_ENTRIES = 400      # 실행 중 캐시하는 이미지/타일 최대 개수
+
+SW_TEMPLATE = """// build_bundle.py 가 생성한 파일입니다. 직접 고치지 마세요.
+var VERSION = '__VERSION__';
+var PREFIX = '__PREFIX__';
+var PRECACHE = PREFIX + '-precache-' + VERSION;
+var DATA_CACHE = PREFIX + '-data-' + VERSION;
+var IMAGE_CACHE = PREFIX + '-images-' + VERSION;
+var MAX_IMAGE_ENTRIES = __MAX_IMAGE_ENTRIES__;
+var PRECACHE_URLS = __PRECACHE_URLS__;
+// 캐시 우선 (해시 이름)
+var IMMUTABLE_PATHS = ['/data/', '/station_images_opt/', '/station_tiles/'];
+// stale-while-revalidate
+var SWR_PATHS = ['/seoulapi', '/station_images/'];
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(caches.open(PRECACHE).then(function(cache) {
+        return cache.addAll(PRECACHE_URLS);
+    }).then(function() { return self.skipWaiting(); }));
+});
+
+// 현재 버전이 아닌 캐시 삭제
+self.addEventListener('activate', function(event) {
+    var keep = [PRECACHE, DATA_CACHE, IMAGE_CACHE];
+    event.waitUntil(caches.keys().then(function(names) {
+        return Promise.all(names.filter(function(name) {
+            return name.indexOf(PREFIX + '-') === 0 && keep.indexOf(name) === -1;
+        }).map(function(name) { return caches.delete(name); }));
+    }).then(function() { return self.clients.claim(); }));
+});
+
+function pathOf(url) {
+    var scope = new URL(self.registration.scope).pathname;
+    return url.origin === self.location.origin && url.pathname.indexOf(scope) === 0
+        ? '/' + url.pathname.slice(scope.length) : url.pathname;
+}
+
+function matches(path, prefixes) {
+    return prefixes.some(function(prefix) { return path.indexOf(prefix) === 0; });
+}
+
+function trimCache(name, max) {
+    return caches.open(name).then(function(cache) {
+        return cache.keys().then(function(keys) {
+            return Promise.all(keys.slice(0, Math.max(0, keys.length - max)).map(function(key) {
+                return cache.delete(key);
+            }));
+        });
+    });
+}
+
+function cacheable(response) {
+    return response && (response.ok || response.type === 'opaque');
+}
+
+function cacheFirst(event, cacheName) {
+    return caches.match(event.request).then(function(cached) {
+        if (cached) return cached;
+        return fetch(event.request).then(function(response) {
+            if (cacheable(response)) {
+                var copy = response.clone();
+                event.waitUntil(caches.open(cacheName).then(function(cache) {
+                    return cache.put(event.request, copy);
+                }).then(function() { return trimCache(IMAGE_CACHE, MAX_IMAGE_ENTRIES); }));
+            }
+            return response;
+        });
+    });
+}
+
+function staleWhileRevalidate(event, cacheName) {
+    return caches.open(cacheName).then(function(cache) {
+        return cache.match(event.request).then(function(cached) {
+            var network = fetch(event.request).then(function(response) {
+                if (cacheable(response)) return cache.put(event.request, response.clone()).then(function() { return response; });
+                return response;
+            });
+            if (cached) {
+                event.waitUntil(network.catch(function() {}));
+                return cached;
+            }
+            return network;
+        });
+    });
+}
+
+self.addEventListener('fetch', function(event) {
+    if (event.request.method !== 'GET') return;
+    var url = new URL(event.request.url);
+    var path = pathOf(url);
+
+    // 페이지: 미리 캐시한 index.html (없으면 네트워크)
+    if (event.request.mode === 'navigate') {
+        event.respondWith(caches.match('index.html', { cacheName: PRECACHE }).then(function(cached) {
+            return cached || fetch(event.request);
+        }).catch(function() { return fetch(event.request); }));
+        return;
+    }
+    if (matches(path, SWR_PATHS)) {
+        event.respondWith(staleWhileRevalidate(event, path === '/seoulapi' ? DATA_CACHE : IMAGE_CACHE));
+        return;
+    }
+    if (url.origin === self.location.origin && matches(path, IMMUTABLE_PATHS)) {
+        event.respondWith(cacheFirst(event, IMAGE_CACHE));
+    }
+});
+"""
+
+
+def precache_images(variants):
+    """역마다 모달 크기 WebP 하나 (image_variants.json 기준)"""
+    urls = []
+    for meta in variants.values():
+        fitting = [v for v in meta['webp'] if v['w'] <= PRECACHE_IMAGE_WIDTH] or meta['webp'][:1]
+        if fitting:
+            urls.append(max(fitting, key=lambda v: v['w'])['src'])
+    return sorted(set(urls))
+
+
+def write_service_worker(out_dir, urls):
+    """out_dir/sw.js 를 쓰고 버전 문자열을 돌려줍니다. urls 는 out_dir 기준 상대 주소."""
+    urls = list(dict.fromkeys(urls))
+    digest = hashlib.sha256()
+    for url in urls:
+        digest.update(url.encode('utf-8'))
+        path = os.path.join(out_dir, *url.split('/'))
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    version = digest.hexdigest()[:12]
+
+    source = (SW_TEMPLATE
+              .replace('__VERSION__', version)
+              .replace('__PREFIX__', CACHE_PREFIX)
+              .replace('__MAX_IMAGE_ENTRIES__', str(MAX_IMAGE_ENTRIES))
+              .replace('__PRECACHE_URLS__', json.dumps(urls, ensure_ascii=False, indent=4)))
+    tmp_path = os.path.join(out_dir, SW_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.replace(tmp_path, os.path.join(out_dir, SW_FILE))
+    return version
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+역 정보 공용 인덱스
+stations.json 과 station_prpr_mapping*.json 을 한 번만 읽고 아래 조회를 O(1)로 제공합니다.
+- 역명                                  -> stations.json 항목 목록
+- (railOprIsttCd, lnCd, stinCd)         -> (역명, 항목)
+- (railOprIsttCd, lnCd, prprStinCd)     -> (매핑 키, 매핑 항목)
+- 이미지 파일명 ("S1_4_0477.png" 또는 "S1_4_이촌 (S1_4_0477.png)") -> 매핑 키
+- stinCd <-> prprStinCd 대응표 (같은 운영기관/노선/역명으로 연결)
+
+사용법:
+    import station_index
+    index = station_index.load()
+    index.prpr_for('S1', '2', '222')
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+STATIONS_FILE = 'stations.json'
+MAPPING_FILE = 'station_prpr_mapping.json'
+MAPPING_OK_FILE = 'station_prpr_mapping_ok.json'
+
+# "S1_4_이촌 (S1_4_0477.png)" 형태의 이미지 파일명
+VIEW_NAME_RE = re.compile(r'^(?P<key>.+) \((?P<file>[^()]+\.png)\)$')
+
+
+def mapping_key(rail, ln, name):
+    """매핑 파일의 키 형식: {railOprIsttCd}_{lnCd}_{역명}"""
+    return f"{rail}_{ln}_{name}"
+
+
+def image_filename(rail, ln, prpr):
+    """KRIC 원본 이미지 파일명: {railOprIsttCd}_{lnCd}_{prprStinCd}.png"""
+    return f"{rail}_{ln}_{prpr}.png"
+
+
+class StationIndex:
+    """stations.json(역명 -> 노선 목록)과 prpr 매핑(키 -> 항목)을 묶은 조회용 인덱스"""
+
+    def __init__(self, stations, mapping, mapping_ok=None):
+        mapping_ok = mapping_ok or {}
+        self.stations = stations
+        # 검증된 매핑(_ok)이 전체 매핑보다 우선
+        self.mapping = dict(mapping)
+        self.mapping.update(mapping_ok)
+        self.ok_keys = list(mapping_ok)
+
+        self._by_stin = {}
+        for name, info_list in stations.items():
+            for info in info_list:
+                self._by_stin[(info['railOprIsttCd'], info['lnCd'], info['stinCd'])] = (name, info)
+
+        self._by_prpr = {}
+        self._by_image = {}
+        for key, info in self.mapping.items():
+            rail, ln, prpr = info['railOprIsttCd'], info['lnCd'], info['prprStinCd']
+            self._by_prpr[(rail, ln, prpr)] = (key, info)
+            self._by_image[image_filename(rail, ln, prpr)] = key
+
+        # stinCd <-> prprStinCd
+        self._stin_to_prpr = {}
+        self._prpr_to_stin = {}
+        for (rail, ln, stin), (name, _) in self._by_stin.items():
+            info = self.mapping.get(mapping_key(rail, ln, name))
+            if info:
+                self._stin_to_prpr[(rail, ln, stin)] = info['prprStinCd']
+                self._prpr_to_stin[(rail, ln, info['prprStinCd'])] = stin
+
+    def by_name(self, name):
+        return self.stations.get(name, [])
+
+    def by_stin(self, rail, ln, stin):
+        """(역명, stations.json 항목) 또는 None"""
+        return self._by_stin.get((rail, ln, stin))
+
+    def by_prpr(self, rail, ln, prpr):
+        """(매핑 키, 매핑 항목) 또는 None"""
+        return self._by_prpr.get((rail, ln, prpr))
+
+    def by_key(self, key):
+        return self.mapping.get(key)
+
+    def key_for_image(self, filename):
+        """원본 이미지 파일명이나 "{키} (원본.png)" 이름에서 매핑 키를 찾습니다."""
+        match = VIEW_NAME_RE.match(filename)
+        if match:
+            return match.group('key')
+        return self._by_image.get(filename)
+
+    def prpr_for(self, rail, ln, stin):
+        return self._stin_to_prpr.get((rail, ln, stin))
+
+    def stin_for(self, rail, ln, prpr):
+        return self._prpr_to_stin.get((rail, ln, prpr))
+
+    def verified(self):
+        """station_prpr_mapping_ok.json 순서대로 (키, 항목)"""
+        return [(key, self.mapping[key]) for key in self.ok_keys]
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load(stations_file=STATIONS_FILE, mapping_file=MAPPING_FILE, mapping_ok_file=MAPPING_OK_FILE):
+    """파일을 한 번만 읽어 인덱스를 만듭니다 (같은 인자로 다시 부르면 같은 객체)."""
+    return StationIndex(_read_json(stations_file), _read_json(mapping_file), _read_json(mapping_ok_file))
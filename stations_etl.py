@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+운영기관 역사 코드정보 엑셀 -> stations.json 변환 (ETL)
+- .xls(xlrd) / .xlsx(openpyxl) 모두 직접 읽음 (xlsx 변환 불필요)
+- 파싱한 표를 파일 해시 기준으로 .cache/stations_etl/ 에 저장해 같은 파일은 다시 파싱하지 않음
+- 행 단위 반복(iterrows) 대신 컬럼 연산 + groupby로 역명 -> 노선 목록 구조 생성
+
+사용법: python stations_etl.py [엑셀 파일] [-o stations.json] [--no-cache]
+구조: { "강남": [{ "railOprIsttCd": "S1", "lnCd": "2", "stinCd": "222", "lnNm": "2호선" }, ...], ... }
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+
+WORKBOOK_FILE = '운영기관_역사_코드정보_2025.07.04.xls'
+OUTPUT_FILE = 'stations.json'
+CACHE_DIR = os.path.join('.cache', 'stations_etl')
+
+# 엑셀 컬럼 -> stations.json 필드
+COLUMNS = {
+    'RAIL_OPR_ISTT_CD': 'railOprIsttCd',  # 운영기관코드
+    'LN_CD': 'lnCd',                      # 노선코드
+    'STIN_CD': 'stinCd',                  # 역코드
+    'LN_NM': 'lnNm'                       # 노선명 (없으면 "")
+}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_workbook(path, use_cache=True):
+    """
+    엑셀 파일을 DataFrame으로 읽습니다. 확장자에 맞는 엔진(.xls=xlrd, .xlsx=openpyxl)을 사용하고
+    같은 내용의 파일은 캐시(pickle)에서 바로 읽습니다.
+    """
+    cache_path = os.path.join(CACHE_DIR, file_hash(path) + '.pkl')
+    if use_cache and os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+
+    engine = 'xlrd' if path.lower().endswith('.xls') else None
+    df = pd.read_excel(path, engine=engine)
+
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    return df
+
+
+def build_station_db(df):
+    """역명별로 묶은 노선 정보 딕셔너리를 만듭니다 (엑셀에 처음 나온 순서 유지)."""
+    out = pd.DataFrame({'name': df['STIN_NM'].astype(str).str.strip()})
+    for column, field in COLUMNS.items():
+        out[field] = df[column].astype(str) if column in df.columns else ''
+
+    fields = list(COLUMNS.values())
+    return {
+        name: group[fields].to_dict('records')
+        for name, group in out.groupby('name', sort=False)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='역사 코드정보 엑셀 -> stations.json')
+    parser.add_argument('workbook', nargs='?', default=WORKBOOK_FILE, help='.xls 또는 .xlsx 파일')
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    parser.add_argument('--no-cache', action='store_true', help='캐시를 쓰지 않고 엑셀을 다시 파싱')
+    args = parser.parse_args()
+
+    df = read_workbook(args.workbook, use_cache=not args.no_cache)
+    station_db = build_station_db(df)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(station_db, f, ensure_ascii=False, indent=4)
+
+    print(f"{args.output} 생성 완료! (역 {len(station_db)}개, 행 {len(df)}개)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""저장소 최상위 스크립트(pipeline.py, html_images.py ...)를 테스트에서 import 할 수 있게 함"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
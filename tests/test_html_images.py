@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""html_images.py 백엔드 회귀 테스트 - 설치된 모든 백엔드가 같은 결과를 내야 함"""
+
+import pytest
+
+import html_images
+
+BASE_URL = 'https://hc.kric.go.kr/hc/page/'
+
+# 주석, script/style 안의 img 와 아이콘/로고/버튼/화살표, 주소 없는 img 는 빠져야 함
+EXPECTED = [
+    {'url': 'https://hc.kric.go.kr/hc/ext/images/nursing/S1_1_0155_1.jpg', 'alt': '동대문역 수유실', 'title': '수유실 입구'},
+    {'url': 'https://hc.kric.go.kr/hc/page/nursing/S1_1_0155_2.jpg', 'alt': 'a>b', 'title': ''},
+    {'url': 'https://hc.kric.go.kr/hc/ext/images/nursing/room.jpg?w=640&h=480', 'alt': '기저귀 교환대', 'title': ''},
+    {'url': 'https://static.kric.go.kr/nursing/S1_1_0155_3.PNG', 'alt': '', 'title': '내부'},
+]
+
+
+@pytest.fixture(scope='module')
+def page():
+    with open(html_images.SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('backend', html_images.available_backends())
+def test_backends_agree(page, backend):
+    assert html_images.extract_images(page, BASE_URL, backend) == EXPECTED
+
+
+def test_auto_prefers_parser_over_regex():
+    order = html_images.AUTO_ORDER
+    assert order.index('stdlib') < order.index('regex')
+    assert html_images.resolve_backend() in html_images.available_backends()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""http_cache.py: stream=True 미스 응답을 미리 읽지 않고, 끝까지 읽었을 때만 저장하는지 시험"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_cache
+
+BODY = bytes(range(256)) * 4096   # 1 MB
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_streamed_miss_is_not_preloaded(tmp_path, server):
+    cache = http_cache.HttpCache('on', str(tmp_path))
+    url = server + '/a.jpg'
+    with cache.get(None, url, stream=True, timeout=10) as r:
+        assert not r._content_consumed
+        body = b''.join(r.iter_content(64 * 1024))
+    assert body == BODY
+    assert cache.stores == 1
+
+    again = cache.get(None, url, stream=True, timeout=10)
+    assert again.from_cache
+    assert again.content == BODY
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_partial_stream_is_not_stored(tmp_path, server):
+    cache = http_cache.HttpCache('on', str(tmp_path))
+    with cache.get(None, server + '/b.jpg', stream=True, timeout=10) as r:
+        next(r.iter_content(1024))
+    assert cache.stores == 0
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files]
+
+
+def test_counters_are_thread_safe(tmp_path, server):
+    cache = http_cache.HttpCache('on', str(tmp_path))
+    url = server + '/c.jpg'
+    cache.get(None, url, timeout=10)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: cache.get(None, url, timeout=10), range(200)))
+    assert (cache.hits, cache.misses) == (200, 1)
+
+
+def test_large_stream_skips_cache(tmp_path, server):
+    cache = http_cache.HttpCache('on', str(tmp_path), max_bytes=len(BODY) // 2)
+    with cache.get(None, server + '/d.jpg', stream=True, timeout=10) as r:
+        assert b''.join(r.iter_content(64 * 1024)) == BODY
+    assert cache.stores == 0
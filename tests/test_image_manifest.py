@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""image_manifest.ImageManifest.sync 상태 판정 테스트 (가짜 엔진, 네트워크 없음)"""
+
+import os
+
+import image_manifest
+
+PNG = b'P' * 2000
+
+
+class FakeResponse:
+    def __init__(self, status, body=b'', headers=None):
+        self.status_code = status
+        self.body = body
+        self.headers = dict(headers or {}, **{'Content-Length': str(len(body))})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, size):
+        yield self.body
+
+
+class FakeEngine:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+def synced(tmp_path):
+    manifest = image_manifest.ImageManifest(str(tmp_path / 'manifest.json'))
+    filepath = str(tmp_path / 'a.png')
+    status = manifest.sync(FakeEngine(FakeResponse(200, PNG, {'ETag': '"1"'})), 'KEY', 'http://x/a.png', filepath)
+    assert status == image_manifest.NEW
+    return manifest, filepath
+
+
+def test_small_200_is_failed_not_gone(tmp_path):
+    manifest, filepath = synced(tmp_path)
+    error_page = FakeResponse(200, b'<html>error</html>')
+    assert manifest.sync(FakeEngine(error_page), 'KEY', 'http://x/a.png', filepath) == image_manifest.FAILED
+    assert 'KEY' in manifest.entries
+    with open(filepath, 'rb') as f:
+        assert f.read() == PNG
+
+
+def test_404_is_gone(tmp_path):
+    manifest, filepath = synced(tmp_path)
+    assert manifest.sync(FakeEngine(FakeResponse(404)), 'KEY', 'http://x/a.png', filepath) == image_manifest.GONE
+    assert 'KEY' not in manifest.entries
+    assert os.path.exists(filepath)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""pipeline.py 단계 회귀 테스트"""
+
+import json
+import os
+import shutil
+
+import pipeline
+from conftest import ROOT
+
+MAPPING = {
+    'S1_1_동대문': {'railOprIsttCd': 'S1', 'lnCd': '1', 'stinNm': '동대문', 'prprStinCd': '0155'},
+    'S1_1_종로3가': {'railOprIsttCd': 'S1', 'lnCd': '1', 'stinNm': '종로3가', 'prprStinCd': '0515'},
+}
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def make_fixture(folder):
+    """보기 이름 파일 1개, 원본 이름 파일 1개, 매핑과 상관없는 파일 1개"""
+    for script in ('rename_station_images.py', 'image_store.py', 'station_index.py'):
+        shutil.copy(os.path.join(ROOT, script), folder)
+    write_json(os.path.join(folder, 'stations.json'), {})
+    write_json(os.path.join(folder, 'station_prpr_mapping.json'), MAPPING)
+    write_json(os.path.join(folder, 'station_prpr_mapping_ok.json'), {})
+    images = os.path.join(folder, 'station_images')
+    os.makedirs(images)
+    for name, body in [('S1_1_동대문 (S1_1_0155.png)', b'png-1' * 200),
+                       ('S1_1_0515.png', b'png-2' * 200),
+                       ('동대문_S1_1.png', b'png-3' * 200)]:
+        with open(os.path.join(images, name), 'wb') as f:
+            f.write(body)
+    return images
+
+
+def test_rename_stage_keeps_files(tmp_path, monkeypatch):
+    images = make_fixture(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    stage = next(stage for stage in pipeline.STAGES if stage.name == 'rename')
+
+    for _ in range(2):
+        ok, _, log_path = pipeline.run_stage(stage)
+        assert ok, open(log_path, encoding='utf-8').read()
+        assert sorted(os.listdir(images)) == [
+            'S1_1_동대문 (S1_1_0155.png)',
+            'S1_1_종로3가 (S1_1_0515.png)',
+            '동대문_S1_1.png',
+        ]
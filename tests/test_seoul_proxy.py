@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""seoul_proxy.py 를 스텁 서울 API에 붙여 시험 (single-flight, stale-while-revalidate, ETag/304, 오류)"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import seoul_proxy
+
+SECRET = 'SECRETKEY123'
+
+
+class StubUpstream:
+    """호출 횟수를 세는 서울 API 대역. status 로 오류를, delay 로 느린 응답을 흉내냄"""
+
+    def __init__(self):
+        self.calls = 0
+        self.status = 200
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.calls += 1
+                    calls = stub.calls
+                time.sleep(stub.delay)
+                body = json.dumps({'response': {'body': {'items': {'item': [{'call': calls}]}}}}).encode('utf-8')
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/{SECRET}/json/getFcNrsrm/1/1000/"
+
+
+@pytest.fixture
+def upstream():
+    stub = StubUpstream()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture
+def start_proxy(tmp_path, upstream):
+    servers = []
+
+    def start(ttl=60, stale_ttl=60):
+        cache = seoul_proxy.ResponseCache(lambda: seoul_proxy.fetch_upstream(upstream.url),
+                                          str(tmp_path / 'cache'), ttl, stale_ttl)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), seoul_proxy.make_handler(cache, 60))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}{seoul_proxy.ROUTE}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_single_flight(upstream, start_proxy):
+    upstream.delay = 0.3
+    url = start_proxy()
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        responses = list(pool.map(lambda _: requests.get(url, timeout=10), range(10)))
+    assert [r.status_code for r in responses] == [200] * 10
+    assert upstream.calls == 1
+    assert len({r.content for r in responses}) == 1
+
+
+def test_stale_while_revalidate(upstream, start_proxy):
+    url = start_proxy(ttl=0.2)
+    first = requests.get(url, timeout=10)
+    assert first.headers['X-Cache'] == 'MISS'
+    time.sleep(0.3)
+
+    stale = requests.get(url, timeout=10)
+    assert stale.headers['X-Cache'] == 'STALE'
+    assert stale.content == first.content
+    for _ in range(50):
+        if upstream.calls == 2:
+            break
+        time.sleep(0.02)
+    assert upstream.calls == 2
+
+    fresh = requests.get(url, timeout=10)
+    assert fresh.headers['X-Cache'] == 'HIT'
+    assert fresh.json()['response']['body']['items']['item'] == [{'call': 2}]
+
+
+def test_etag_not_modified(upstream, start_proxy):
+    url = start_proxy()
+    first = requests.get(url, timeout=10)
+    etag = first.headers['ETag']
+    again = requests.get(url, headers={'If-None-Match': etag}, timeout=10)
+    assert again.status_code == 304
+    assert again.content == b''
+    assert again.headers['ETag'] == etag
+    assert upstream.calls == 1
+
+
+def test_upstream_error_hides_key(upstream, start_proxy, capsys):
+    upstream.status = 500
+    url = start_proxy()
+    response = requests.get(url, timeout=10)
+    assert response.status_code == 502
+    assert response.json() == {'error': 'upstream error', 'status': 500}
+    assert SECRET not in response.text
+    assert SECRET not in capsys.readouterr().out